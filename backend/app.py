@@ -3,18 +3,26 @@ from flask import Flask
 from flask_sqlalchemy import SQLAlchemy
 from flask_jwt_extended import JWTManager
 from flask_cors import CORS
+from sqlalchemy.exc import IntegrityError, OperationalError
 import config
 from models.models import db
+from libs.query_budget import init_query_budget
+from libs.revocation import init_token_blocklist
 
 
-def create_app():
+def create_app(config_object=None, start_background=True):
     app = Flask(__name__)
-    app.config.from_object(config.Config)
-   
-   
+    app.config.from_object(config_object or config.get_config())
+    # BOOKSTORE_<SETTING> environment variables override the profile; values
+    # are parsed as JSON where possible, e.g. BOOKSTORE_JOB_WORKER_THREADS=4
+    app.config.from_prefixed_env('BOOKSTORE')
+    config.check_required(app.config)
+
     db.init_app(app)
+    init_query_budget(app, db)
     CORS(app)
-    JWTManager(app)
+    jwt = JWTManager(app)
+    init_token_blocklist(jwt)
    
     from routes.auth_routes import auth_bp
     from routes.book_routes import book_bp
@@ -22,17 +30,51 @@ def create_app():
     from routes.author_routes import author_bp
     from routes.order_routes import order_bp
     from routes.address_routes import address_bp
+    from routes.catalog_routes import catalog_bp
+    from routes.cart_routes import cart_bp
+    from routes.asset_routes import asset_bp
+    from routes.report_routes import report_bp
+    from routes.geo_routes import geo_bp
     app.register_blueprint(auth_bp, url_prefix='/api/auth')
     app.register_blueprint(book_bp, url_prefix='/api/books')
     app.register_blueprint(user_bp, url_prefix='/api/users')
     app.register_blueprint(author_bp, url_prefix='/api/authors')
     app.register_blueprint(order_bp, url_prefix='/api/orders')
     app.register_blueprint(address_bp, url_prefix='/api')
+    app.register_blueprint(catalog_bp, url_prefix='/api/catalog')
+    app.register_blueprint(cart_bp, url_prefix='/api/cart')
+    app.register_blueprint(asset_bp, url_prefix='/api/assets')
+    app.register_blueprint(report_bp, url_prefix='/api/reports')
+    app.register_blueprint(geo_bp, url_prefix='/api/geo')
  
     with app.app_context():
         from models.models import Role
         db.create_all()
 
+        # create_all() skips existing tables, so add indexes declared later on
+        for table in db.metadata.sorted_tables:
+            for index in table.indexes:
+                try:
+                    index.create(db.engine, checkfirst=True)
+                except OperationalError as e:
+                    # Column not added yet; the matching migrate_*.py script fixes it
+                    app.logger.warning(f"Skipping index {index.name}: {e.orig}")
+                except IntegrityError as e:
+                    # Unique index over existing duplicates; they need cleaning up first
+                    app.logger.warning(f"Skipping unique index {index.name}: {e.orig}")
+
+        from libs.search import ensure_search_index
+        from libs.cache import ensure_catalog_state
+        ensure_search_index()
+        ensure_catalog_state()
+
+        # Map the gazetteer now, so workers forked after this share its pages
+        from libs.gazetteer import get_gazetteer
+        if get_gazetteer() is None:
+            app.logger.warning(
+                f"No gazetteer at {app.config['GEO_GAZETTEER_PATH']}; address lookup and validation are disabled"
+            )
+
         if Role.query.count() == 0:
             db.session.add_all([
                 Role(name='customer'),
@@ -40,8 +82,27 @@ def create_app():
             ])
             db.session.commit()
 
+    if start_background:
+        start_background_tasks(app)
+
     return app
 
+
+def start_background_tasks(app):
+    """Start this process's reservation sweeper and job worker threads.
+
+    Threads do not survive fork(), so a server that builds the app before
+    forking (gunicorn with preload_app, see gunicorn.conf.py) calls this in
+    every worker instead of in create_app().
+    """
+    if app.config['RESERVATION_SWEEPER_ENABLED']:
+        from libs.inventory import start_reservation_sweeper
+        start_reservation_sweeper(app)
+
+    if app.config['JOB_WORKERS_ENABLED']:
+        from libs.jobs import start_job_workers
+        start_job_workers(app)
+
 if __name__ == '__main__':
     app = create_app()
     app.run(host='0.0.0.0', port=5000, debug=True)
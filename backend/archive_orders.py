@@ -0,0 +1,36 @@
+"""
+Move finished (Completed/Cancelled) orders older than ORDER_ARCHIVE_AFTER_DAYS
+into the archived_order/archived_order_item tables
+Usage: python archive_orders.py [--days 365] [--batch-size 500] [--max-batches N]
+"""
+import argparse
+import time
+
+from app import create_app
+from libs.archive import archive_cutoff, archive_orders
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Archive old finished orders")
+    parser.add_argument("--days", type=int, help="minimum order age (default ORDER_ARCHIVE_AFTER_DAYS)")
+    parser.add_argument("--batch-size", type=int, help="orders per transaction (default ORDER_ARCHIVE_BATCH_SIZE)")
+    parser.add_argument("--max-batches", type=int, help="stop after this many batches")
+    args = parser.parse_args()
+
+    app = create_app()
+    with app.app_context():
+        days = args.days if args.days is not None else app.config["ORDER_ARCHIVE_AFTER_DAYS"]
+        started = time.perf_counter()
+        moved = archive_orders(
+            archive_cutoff(days),
+            batch_size=args.batch_size or app.config["ORDER_ARCHIVE_BATCH_SIZE"],
+            pause=app.config["ORDER_ARCHIVE_PAUSE"],
+            max_batches=args.max_batches,
+        )
+        elapsed = time.perf_counter() - started
+
+    print(f"✅ Archived {moved} orders older than {days} days in {elapsed:.2f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+"""
+Multi-threaded checkout stress test
+Hammers POST /api/orders/ for a handful of books with little stock and checks
+that nothing is oversold, then reports orders/sec under contention.
+Usage: python bench_checkout.py [--threads 16] [--attempts 50] [--stock 200]
+"""
+import argparse
+import os
+import tempfile
+import threading
+import time
+from collections import Counter
+
+import config
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Checkout contention stress test")
+    parser.add_argument("--threads", type=int, default=16)
+    parser.add_argument("--attempts", type=int, default=50, help="orders tried per thread")
+    parser.add_argument("--books", type=int, default=3)
+    parser.add_argument("--stock", type=int, default=200, help="initial stock per book")
+    args = parser.parse_args()
+
+    # Run against a throwaway database, never the real one
+    tmp_dir = tempfile.mkdtemp()
+    config.Config.SQLALCHEMY_DATABASE_URI = "sqlite:///" + os.path.join(tmp_dir, "bench.db")
+    config.Config.RESPONSE_CACHE_ENABLED = False
+
+    from app import create_app
+    from models.models import db, Book, Order, OrderItem, Role, User
+    from flask_jwt_extended import create_access_token
+
+    app = create_app()
+    with app.app_context():
+        role = Role.query.filter_by(name="customer").first()
+        books = [Book(title=f"Flash sale {i}", price=9.99, stock_quantity=args.stock) for i in range(args.books)]
+        users = [User(username=f"bench{i}", email=f"bench{i}@example.com", role_id=role.id) for i in range(args.threads)]
+        db.session.add_all(books + users)
+        db.session.commit()
+        book_ids = [book.id for book in books]
+        tokens = [create_access_token(identity=user.id) for user in users]
+
+    statuses = Counter()
+    lock = threading.Lock()
+
+    def shopper(n):
+        client = app.test_client()
+        headers = {"Authorization": f"Bearer {tokens[n]}"}
+        for i in range(args.attempts):
+            # Every order takes one copy of two books, in varying order
+            first = book_ids[(n + i) % len(book_ids)]
+            second = book_ids[(n + i + 1) % len(book_ids)]
+            items = [{"book_id": first, "quantity": 1}]
+            if second != first:
+                items.append({"book_id": second, "quantity": 1})
+            response = client.post("/api/orders/", json={"items": items}, headers=headers)
+            with lock:
+                statuses[response.status_code] += 1
+
+    threads = [threading.Thread(target=shopper, args=(n,)) for n in range(args.threads)]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+
+    with app.app_context():
+        sold = Counter()
+        for book_id, quantity in db.session.execute(
+            db.select(OrderItem.book_id, db.func.sum(OrderItem.quantity)).group_by(OrderItem.book_id)
+        ):
+            sold[book_id] = quantity
+        orders = Order.query.count()
+
+        oversold = False
+        for book in Book.query.filter(Book.id.in_(book_ids)):
+            ok = book.stock_quantity >= 0 and sold[book.id] + book.stock_quantity == args.stock
+            oversold = oversold or not ok
+            print(f"{book.title}: sold {sold[book.id]}, left {book.stock_quantity} {'✅' if ok else '❌'}")
+
+    total = sum(statuses.values())
+    print(f"Responses: {dict(statuses)}")
+    print(f"{orders} orders placed, {total} attempts in {elapsed:.2f}s "
+          f"({orders / elapsed:,.0f} orders/s, {total / elapsed:,.0f} requests/s)")
+    if oversold or statuses[201] != orders:
+        print("❌ Oversell or lost order detected")
+        raise SystemExit(1)
+    print("✅ No oversell")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+"""
+Login burst benchmark
+Fires concurrent POST /api/auth/login requests at a throwaway database and
+reports logins/sec, latency percentiles and how many requests were shed with
+503, with password hashing on the process pool or inline.
+Usage: python bench_login.py [--threads 32] [--logins 10] [--inline] [--workers N] [--max-pending N] [--method scrypt]
+"""
+import argparse
+import os
+import tempfile
+import threading
+import time
+from collections import Counter
+
+import config
+
+
+def percentile(values, pct):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * pct / 100))]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Login burst benchmark")
+    parser.add_argument("--threads", type=int, default=32)
+    parser.add_argument("--logins", type=int, default=10, help="logins per thread")
+    parser.add_argument("--inline", action="store_true", help="hash in the request thread (no pool)")
+    parser.add_argument("--workers", type=int, help="pool processes (default PASSWORD_POOL_WORKERS)")
+    parser.add_argument("--max-pending", type=int, help="queue depth before 503 (default PASSWORD_POOL_MAX_PENDING)")
+    parser.add_argument("--method", help="hash method (default PASSWORD_HASH_METHOD)")
+    args = parser.parse_args()
+
+    # Run against a throwaway database, never the real one
+    tmp_dir = tempfile.mkdtemp()
+    config.Config.SQLALCHEMY_DATABASE_URI = "sqlite:///" + os.path.join(tmp_dir, "bench.db")
+    config.Config.PASSWORD_POOL_ENABLED = not args.inline
+    config.Config.JOB_WORKERS_ENABLED = False
+    config.Config.RESERVATION_SWEEPER_ENABLED = False
+    if args.workers:
+        config.Config.PASSWORD_POOL_WORKERS = args.workers
+    if args.max_pending is not None:
+        config.Config.PASSWORD_POOL_MAX_PENDING = args.max_pending
+    if args.method:
+        config.Config.PASSWORD_HASH_METHOD = args.method
+
+    from app import create_app
+    from models.models import db, Role, User
+
+    app = create_app()
+    with app.app_context():
+        role = Role.query.filter_by(name="customer").first()
+        users = [User(username=f"bench{i}", email=f"bench{i}@example.com", role_id=role.id) for i in range(args.threads)]
+        for user in users:
+            user.set_password("bench-password")
+        db.session.add_all(users)
+        db.session.commit()
+
+    statuses = Counter()
+    latencies = []
+    lock = threading.Lock()
+
+    def burst(n):
+        client = app.test_client()
+        for _ in range(args.logins):
+            started = time.perf_counter()
+            response = client.post("/api/auth/login", json={"username": f"bench{n}", "password": "bench-password"})
+            elapsed = time.perf_counter() - started
+            with lock:
+                statuses[response.status_code] += 1
+                latencies.append(elapsed)
+
+    threads = [threading.Thread(target=burst, args=(n,)) for n in range(args.threads)]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+
+    mode = "inline" if args.inline else f"pool of {app.config['PASSWORD_POOL_WORKERS'] or os.cpu_count()}"
+    print(f"Hashing: {app.config['PASSWORD_HASH_METHOD']} ({mode}), {os.cpu_count()} CPUs")
+    print(f"Responses: {dict(statuses)}")
+    print(f"{statuses[200]} logins in {elapsed:.2f}s ({statuses[200] / elapsed:,.1f} logins/s)")
+    print(f"Latency p50 {percentile(latencies, 50) * 1000:.0f}ms, "
+          f"p99 {percentile(latencies, 99) * 1000:.0f}ms, max {max(latencies) * 1000:.0f}ms")
+
+
+if __name__ == "__main__":
+    main()
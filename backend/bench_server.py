@@ -0,0 +1,166 @@
+"""
+Server capacity benchmark
+Seeds a throwaway database, starts the API under the Flask dev server
+(`python app.py`) or gunicorn (`gunicorn.conf.py` + `wsgi:app`), drives a mix
+of catalog, search, address-lookup and order-history reads over keep-alive
+connections, and reports requests/sec and latency percentiles.
+Usage: python bench_server.py [--server dev|gunicorn] [--clients 16] [--duration 20] [--workers N] [--threads N]
+"""
+import argparse
+import http.client
+import os
+import signal
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from collections import Counter
+from urllib.parse import quote
+
+PORT = 5000
+SECRET = "bench-secret"
+
+
+def percentile(values, pct):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * pct / 100))]
+
+
+def seed(books):
+    from app import create_app
+    from models.models import db, Book, Order, Role, User
+    from flask_jwt_extended import create_access_token
+
+    app = create_app(start_background=False)
+    with app.app_context():
+        role = Role.query.filter_by(name="customer").first()
+        user = User(username="bench", email="bench@example.com", role_id=role.id)
+        db.session.add(user)
+        db.session.add_all(
+            Book(title=f"Benchmark Book {i}", price=100 + i % 400, stock_quantity=50) for i in range(books)
+        )
+        db.session.flush()
+        db.session.add_all(
+            Order(user_id=user.id, total_amount=100, status="Completed") for _ in range(20)
+        )
+        db.session.commit()
+        return create_access_token(identity=user.id)
+
+
+def start_server(server, env, workers, threads):
+    if server == "dev":
+        command = [sys.executable, "app.py"]
+    else:
+        command = [sys.executable, "-m", "gunicorn", "-c", "gunicorn.conf.py", "wsgi:app"]
+        env.update(APP_ENV="production", GUNICORN_BIND=f"127.0.0.1:{PORT}", GUNICORN_ACCESS_LOG="")
+        if workers:
+            env["GUNICORN_WORKERS"] = str(workers)
+        if threads:
+            env["GUNICORN_THREADS"] = str(threads)
+    # Own process group: the dev server's reloader runs the app in a child
+    process = subprocess.Popen(command, env=env, start_new_session=True,
+                               stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    deadline = time.time() + 30
+    while time.time() < deadline:
+        try:
+            conn = http.client.HTTPConnection("127.0.0.1", PORT, timeout=1)
+            conn.request("GET", "/api/geo/postal-codes/10330")
+            conn.getresponse().read()
+            return process
+        except OSError:
+            time.sleep(0.2)
+    stop_server(process)
+    raise SystemExit(f"{server} server did not start on port {PORT}")
+
+
+def stop_server(process):
+    os.killpg(process.pid, signal.SIGTERM)
+    process.wait(timeout=60)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Server capacity benchmark")
+    parser.add_argument("--server", choices=("dev", "gunicorn"), default="gunicorn")
+    parser.add_argument("--clients", type=int, default=16, help="concurrent keep-alive connections")
+    parser.add_argument("--duration", type=float, default=20, help="seconds of load")
+    parser.add_argument("--books", type=int, default=500)
+    parser.add_argument("--workers", type=int, help="gunicorn workers (default from gunicorn.conf.py)")
+    parser.add_argument("--threads", type=int, help="gunicorn threads per worker")
+    args = parser.parse_args()
+
+    # Run against a throwaway database, never the real one; the server
+    # process picks the same settings up from the environment
+    tmp_dir = tempfile.mkdtemp()
+    env = dict(
+        os.environ,
+        BOOKSTORE_SQLALCHEMY_DATABASE_URI="sqlite:///" + os.path.join(tmp_dir, "bench.db"),
+        BOOKSTORE_SECRET_KEY=SECRET,
+        BOOKSTORE_JWT_SECRET_KEY=SECRET,
+        BOOKSTORE_DOWNLOAD_LINK_SECRET=SECRET,
+        BOOKSTORE_PASSWORD_POOL_ENABLED="false",
+    )
+    os.environ.update(env)
+    token = seed(args.books)
+
+    headers = {"Authorization": f"Bearer {token}"}
+    requests = [
+        ("/api/books/?limit=24", {}),
+        ("/api/books/?limit=24&sort=price&order=desc", {}),
+        ("/api/books/{book_id}", {}),
+        ("/api/books/search?q=Book", {}),
+        ("/api/geo/autocomplete?q=" + quote("บาง"), {}),
+        ("/api/orders/me?limit=10", headers),
+    ]
+
+    process = start_server(args.server, env, args.workers, args.threads)
+    statuses = Counter()
+    latencies = []
+    lock = threading.Lock()
+    deadline = time.perf_counter() + args.duration
+
+    def client(n):
+        conn = http.client.HTTPConnection("127.0.0.1", PORT, timeout=30)
+        local_statuses, local_latencies = Counter(), []
+        i = n
+        while time.perf_counter() < deadline:
+            path, request_headers = requests[i % len(requests)]
+            path = path.format(book_id=1 + i % args.books)
+            i += 1
+            started = time.perf_counter()
+            try:
+                conn.request("GET", path, headers=request_headers)
+                response = conn.getresponse()
+                response.read()
+                local_statuses[response.status] += 1
+            except (OSError, http.client.HTTPException):
+                local_statuses["error"] += 1
+                conn.close()
+                conn = http.client.HTTPConnection("127.0.0.1", PORT, timeout=30)
+                continue
+            local_latencies.append(time.perf_counter() - started)
+        with lock:
+            statuses.update(local_statuses)
+            latencies.extend(local_latencies)
+
+    threads = [threading.Thread(target=client, args=(n,)) for n in range(args.clients)]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+    stop_server(process)
+
+    total = sum(statuses.values())
+    print(f"{args.server}: {total} requests from {args.clients} clients in {elapsed:.1f}s "
+          f"({total / elapsed:,.0f} requests/s)")
+    print(f"Responses: {dict(statuses)}")
+    if latencies:
+        print(f"Latency p50 {percentile(latencies, 50) * 1000:.1f} ms, "
+              f"p95 {percentile(latencies, 95) * 1000:.1f} ms, "
+              f"p99 {percentile(latencies, 99) * 1000:.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,32 @@
+"""Pack a Thai address list into the gazetteer file served by /api/geo.
+
+    python build_gazetteer.py data/th_gazetteer_seed.csv
+    python build_gazetteer.py thai_address_database.json --out data/th_gazetteer.bin
+
+Accepts a CSV with sub_district,district,province,postal_code columns or the
+JSON list published by the open Thai address databases (district, amphoe,
+province, zipcode). The repo ships a small seed CSV; build from the full
+national list for production.
+"""
+import argparse
+import time
+
+import config
+from libs.gazetteer import Gazetteer, build_gazetteer, read_source_rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("source", help="CSV or JSON address list")
+    parser.add_argument("--out", help="output file (default: GEO_GAZETTEER_PATH)")
+    args = parser.parse_args()
+
+    out = args.out or config.Config.GEO_GAZETTEER_PATH
+    count = build_gazetteer(read_source_rows(args.source), out)
+    started = time.perf_counter()
+    Gazetteer(out)
+    print(f"Wrote {count} sub-districts to {out} (loads in {(time.perf_counter() - started) * 1000:.2f} ms)")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,5 +1,6 @@
 # config.py
 import datetime
+import os
 
 class Config:
     # --- Database Settings (Using SQLite for local dev) ---
@@ -9,6 +10,139 @@ class Config:
     # --- JWT (JSON Web Token) Configuration ---
     JWT_SECRET_KEY = 'admin_secret_key' 
     JWT_ACCESS_TOKEN_EXPIRES = datetime.timedelta(hours=1, minutes=24)
+    JWT_REFRESH_TOKEN_EXPIRES = datetime.timedelta(days=30)
+    # Revoked token ids are checked against an in-memory set, refreshed from
+    # the revoked_token table at most this often (seconds); logouts handled
+    # by another worker process apply within this delay
+    JWT_BLOCKLIST_SYNC_INTERVAL = 5
+    JWT_BLOCKLIST_PRUNE_INTERVAL = 3600  # seconds between deletes of expired entries
     
     # General App Secret
-    SECRET_KEY = 'admin_secret_key'
\ No newline at end of file
+    SECRET_KEY = 'admin_secret_key'
+
+    # --- Catalog pagination ---
+    CATALOG_PAGE_SIZE = 24
+    CATALOG_MAX_PAGE_SIZE = 100
+
+    # --- Catalog facets ---
+    # Lower bounds of the price buckets; the last bucket is open-ended
+    CATALOG_PRICE_BUCKETS = [0, 100, 200, 500, 1000]
+    CATALOG_AUTHOR_FACET_LIMIT = 50
+
+    # --- Catalog delta sync ---
+    CATALOG_SYNC_PAGE_SIZE = 500  # books per /api/catalog/changes page
+
+    # --- Query budget guard (None, "warn" or "raise") ---
+    # Counts SQL statements per request and checks them against @query_budget
+    QUERY_BUDGET_MODE = None
+
+    # --- Response cache for catalog reads ---
+    RESPONSE_CACHE_ENABLED = True
+    RESPONSE_CACHE_MAX_BYTES = 32 * 1024 * 1024
+    RESPONSE_CACHE_TTL = 300  # seconds
+
+    # --- Bulk catalog import ---
+    IMPORT_BATCH_SIZE = 1000
+    IMPORT_MAX_BATCH_SIZE = 10000  # each batch binds its book ids in one IN (SQLite caps bound variables)
+    IMPORT_MAX_ERRORS = 1000  # per-row errors kept in the report
+
+    # --- Local asset store (book covers and files) ---
+    ASSET_ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'instance', 'assets')
+    DOWNLOAD_LINK_SECRET = 'admin_secret_key'
+    DOWNLOAD_LINK_TTL = 300  # seconds a signed book-file link stays valid
+
+    # --- Order history (GET /api/orders/me) ---
+    ORDER_HISTORY_PAGE_SIZE = 20
+    ORDER_HISTORY_MAX_PAGE_SIZE = 100
+
+    # --- Checkout ---
+    ORDER_RETRY_ATTEMPTS = 5
+    ORDER_RETRY_BACKOFF = 0.02  # seconds, doubled on every retry
+
+    # --- Checkout reservations ---
+    RESERVATION_TTL = 600  # seconds a checkout holds its stock
+    RESERVATION_SWEEP_INTERVAL = 30  # seconds between expired-hold sweeps
+    RESERVATION_SWEEPER_ENABLED = True
+
+    # --- Idempotency-Key replay for POST /api/orders ---
+    IDEMPOTENCY_TTL = 24 * 3600  # seconds a stored response is replayed
+    IDEMPOTENCY_LOCK_TIMEOUT = 60  # seconds before an unfinished claim can be taken over
+    IDEMPOTENCY_WAIT = 10  # seconds a concurrent duplicate waits for the first response
+
+    # --- Sales reports ---
+    REPORT_DEFAULT_LIMIT = 10  # rows in top-seller / author reports
+    REPORT_MAX_LIMIT = 100
+
+    # --- Background jobs (post-order work) ---
+    JOB_WORKERS_ENABLED = True  # run workers inside the web process; or use run_worker.py
+    JOB_WORKER_THREADS = 2
+    JOB_POLL_INTERVAL = 1.0  # seconds an idle worker waits before polling again
+    JOB_MAX_ATTEMPTS = 5
+    JOB_RETRY_BACKOFF = 2.0  # seconds, doubled on every retry
+    JOB_LOCK_TIMEOUT = 300  # seconds before a job claimed by a dead worker is retried
+
+    # --- Order archival (archive_orders.py) ---
+    ORDER_ARCHIVE_AFTER_DAYS = 365  # finished orders older than this move to the archive
+    ORDER_ARCHIVE_BATCH_SIZE = 500  # orders moved per transaction
+    ORDER_ARCHIVE_PAUSE = 0.05  # seconds between batches, so checkouts can take the write lock
+
+    # --- Admin user listing ---
+    USER_PAGE_SIZE = 50
+    USER_MAX_PAGE_SIZE = 200
+
+    # --- Role checks (requires_roles) ---
+    ROLE_CACHE_MAX_ENTRIES = 10000
+    ROLE_CACHE_TTL = 30  # seconds; bounds how long another worker's role change takes to apply
+
+    # --- Password hashing ---
+    # Any werkzeug method, e.g. "scrypt:32768:8:1" or "pbkdf2:sha256:600000".
+    # Stored hashes using another method or cost are upgraded on login.
+    PASSWORD_HASH_METHOD = "scrypt:32768:8:1"
+    PASSWORD_POOL_ENABLED = True  # hash on a process pool instead of the request thread
+    PASSWORD_POOL_WORKERS = None  # None = one per CPU
+    PASSWORD_POOL_MAX_PENDING = 32  # queued operations beyond the workers before answering 503
+    PASSWORD_POOL_TIMEOUT = 5  # seconds
+
+    # --- Thai address gazetteer (build with build_gazetteer.py) ---
+    GEO_GAZETTEER_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data', 'th_gazetteer.bin')
+    GEO_STRICT_ADDRESSES = False  # also reject postal codes missing from the gazetteer
+    GEO_AUTOCOMPLETE_LIMIT = 10
+    GEO_AUTOCOMPLETE_MAX_LIMIT = 50
+
+
+class ProductionConfig(Config):
+    # Secrets have no defaults here; set BOOKSTORE_SECRET_KEY,
+    # BOOKSTORE_JWT_SECRET_KEY and BOOKSTORE_DOWNLOAD_LINK_SECRET
+    SECRET_KEY = None
+    JWT_SECRET_KEY = None
+    DOWNLOAD_LINK_SECRET = None
+    REQUIRED_SETTINGS = ('SECRET_KEY', 'JWT_SECRET_KEY', 'DOWNLOAD_LINK_SECRET')
+
+    # gunicorn already runs a worker process per CPU (and more), each with
+    # its own job threads and hashing pool
+    JOB_WORKER_THREADS = 1
+    PASSWORD_POOL_WORKERS = 1
+
+
+# APP_ENV picks the profile; any setting can then be overridden with a
+# BOOKSTORE_<SETTING> environment variable (see create_app)
+PROFILES = {
+    'development': Config,
+    'production': ProductionConfig,
+}
+
+
+def get_config(name=None):
+    name = name or os.environ.get('APP_ENV', 'development')
+    try:
+        return PROFILES[name]
+    except KeyError:
+        raise ValueError(f"Unknown APP_ENV '{name}'. Use one of: {', '.join(PROFILES)}")
+
+
+def check_required(settings):
+    missing = [name for name in settings.get('REQUIRED_SETTINGS', ()) if not settings.get(name)]
+    if missing:
+        raise RuntimeError(
+            "Missing required settings: " + ", ".join(f"BOOKSTORE_{name}" for name in missing)
+        )
@@ -0,0 +1,61 @@
+"""gunicorn settings for the API:
+
+    gunicorn -c gunicorn.conf.py wsgi:app
+
+Every value can be overridden with the GUNICORN_* environment variable named
+next to it. `kill -HUP <master pid>` re-reads this file and replaces the
+workers gracefully: new workers start and old ones finish their in-flight
+requests (up to graceful_timeout) before exiting. With preload_app the
+application code is loaded once in the master, so a HUP does not pick up new
+code; restart the master for that, or run with GUNICORN_PRELOAD=false.
+"""
+import multiprocessing
+import os
+
+
+def _env(name, default, cast=int):
+    value = os.environ.get(name)
+    return default if value in (None, "") else cast(value)
+
+
+def _flag(value):
+    return value.lower() in ("1", "true", "yes")
+
+
+bind = _env("GUNICORN_BIND", "0.0.0.0:5000", str)
+
+# Requests are mostly CPU-bound Python holding the GIL, so parallelism comes
+# from processes. Threads overlap the waits on SQLite locks and the password
+# hashing pool.
+workers = _env("GUNICORN_WORKERS", multiprocessing.cpu_count() * 2 + 1)
+threads = _env("GUNICORN_THREADS", 4)
+worker_class = "gthread"
+
+# Build the app once in the master: startup work (create_all, index checks,
+# the gazetteer mmap) runs once instead of racing in every worker, and the
+# workers share its memory pages.
+preload_app = _env("GUNICORN_PRELOAD", True, _flag)
+
+keepalive = _env("GUNICORN_KEEPALIVE", 5)  # seconds an idle client connection is kept open
+timeout = _env("GUNICORN_TIMEOUT", 30)  # seconds before a silent worker is killed and replaced
+graceful_timeout = _env("GUNICORN_GRACEFUL_TIMEOUT", 30)  # seconds to finish requests on restart
+
+accesslog = os.environ.get("GUNICORN_ACCESS_LOG", "-") or None  # empty disables it
+errorlog = "-"
+
+# Worker heartbeats go to a tmpfs when there is one (a disk-backed /tmp in a
+# container can stall them long enough to trip the timeout)
+if os.path.isdir("/dev/shm"):
+    worker_tmp_dir = "/dev/shm"
+
+
+def post_fork(server, worker):
+    from app import start_background_tasks
+    from models.models import db
+    from wsgi import app
+
+    with app.app_context():
+        # Pooled connections opened by the master must not be shared with
+        # the workers; drop them without closing the master's handles
+        db.engine.dispose(close=False)
+    start_background_tasks(app)
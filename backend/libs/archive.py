@@ -0,0 +1,97 @@
+import time
+from datetime import datetime, timedelta
+
+from sqlalchemy import bindparam, delete, insert, literal, select, union_all
+
+from models.models import db, ArchivedOrder, ArchivedOrderItem, Order, OrderItem
+
+ARCHIVABLE_STATUSES = ("Completed", "Cancelled")
+
+_ORDER_COLUMNS = ["id", "user_id", "order_date", "total_amount", "status"]
+_ITEM_COLUMNS = ["id", "order_id", "book_id", "quantity", "price_at_purchase"]
+
+
+def archive_cutoff(days):
+    return datetime.utcnow() - timedelta(days=days)
+
+
+def _archive_batch(cutoff, batch_size):
+    order_ids = db.session.execute(
+        select(Order.id)
+        .where(Order.status.in_(ARCHIVABLE_STATUSES), Order.order_date < cutoff)
+        .order_by(Order.id)
+        .limit(batch_size)
+    ).scalars().all()
+    if not order_ids:
+        return 0
+
+    ids = bindparam("ids", expanding=True)
+    order_table, item_table = Order.__table__, OrderItem.__table__
+    conn = db.session.connection()
+    now = datetime.utcnow()
+    conn.execute(
+        insert(ArchivedOrder.__table__).from_select(
+            _ORDER_COLUMNS + ["archived_at"],
+            select(*[order_table.c[name] for name in _ORDER_COLUMNS], literal(now))
+            .where(order_table.c.id.in_(ids)),
+        ),
+        {"ids": order_ids},
+    )
+    conn.execute(
+        insert(ArchivedOrderItem.__table__).from_select(
+            _ITEM_COLUMNS,
+            select(*[item_table.c[name] for name in _ITEM_COLUMNS]).where(item_table.c.order_id.in_(ids)),
+        ),
+        {"ids": order_ids},
+    )
+    conn.execute(delete(item_table).where(item_table.c.order_id.in_(ids)), {"ids": order_ids})
+    conn.execute(delete(order_table).where(order_table.c.id.in_(ids)), {"ids": order_ids})
+    db.session.commit()
+    return len(order_ids)
+
+
+def archive_orders(cutoff, batch_size=500, pause=0.0, max_batches=None):
+    """Move finished orders placed before ``cutoff`` into the archive tables.
+
+    Each batch is its own short transaction, with ``pause`` seconds between
+    batches, so online checkouts never wait behind the whole run. Safe to
+    interrupt and re-run. Returns the number of orders moved.
+    """
+    moved = batches = 0
+    while max_batches is None or batches < max_batches:
+        try:
+            count = _archive_batch(cutoff, batch_size)
+        except Exception:
+            db.session.rollback()
+            raise
+        moved += count
+        batches += 1
+        if count < batch_size:
+            break
+        time.sleep(pause)
+    return moved
+
+
+def find_order(order_id):
+    """Live order by id, falling back to the archive."""
+    return db.session.get(Order, order_id) or db.session.get(ArchivedOrder, order_id)
+
+
+def live_order_lines():
+    """Subquery of every item of a non-Cancelled order, live or archived.
+
+    Columns: order_id, user_id, order_date, book_id, quantity,
+    price_at_purchase. Used by the rebuild/backfill commands, which must
+    not forget orders once they are archived.
+    """
+    def lines(order, item):
+        return (
+            select(
+                order.id.label("order_id"), order.user_id, order.order_date,
+                item.book_id, item.quantity, item.price_at_purchase,
+            )
+            .join(item, item.order_id == order.id)
+            .where(order.status != "Cancelled")
+        )
+    return union_all(lines(Order, OrderItem), lines(ArchivedOrder, ArchivedOrderItem)).subquery()
+
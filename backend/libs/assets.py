@@ -0,0 +1,160 @@
+import hashlib
+import hmac
+import os
+import time
+import re
+import tempfile
+
+from flask import current_app
+
+# Two namespaces: cover images are public, book files are served only
+# through signed links
+IMAGE_EXTENSIONS = {".jpg", ".jpeg", ".png", ".webp", ".gif"}
+FILE_EXTENSIONS = {".pdf", ".epub"}
+KIND_EXTENSIONS = {"images": IMAGE_EXTENSIONS, "files": FILE_EXTENSIONS}
+
+# Cover thumbnail widths; each is derived from the cover so its URL is as
+# immutable as the cover's.
+THUMBNAIL_SIZES = (160, 320, 640)
+
+ASSET_URL_PREFIX = "/api/assets"
+_NAME_RE = re.compile(r"^([0-9a-f]{64})(\.[a-z0-9]+)$")
+_CHUNK_SIZE = 1024 * 1024
+
+
+class InvalidAsset(ValueError):
+    pass
+
+
+def asset_root():
+    return current_app.config["ASSET_ROOT"]
+
+
+def asset_path(kind, name):
+    """Disk path for ``name`` (``<sha256><ext>``), fanned out by hash prefix."""
+    match = _NAME_RE.match(name)
+    if kind not in KIND_EXTENSIONS or not match or match.group(2) not in KIND_EXTENSIONS[kind]:
+        raise InvalidAsset("Unknown asset")
+    digest = match.group(1)
+    return os.path.join(asset_root(), kind, digest[:2], digest[2:4], name)
+
+
+def thumbnail_path(digest, size):
+    return os.path.join(asset_root(), "thumbs", digest[:2], digest[2:4], f"{digest}-{size}.jpg")
+
+
+def asset_url(kind, name):
+    return f"{ASSET_URL_PREFIX}/{kind}/{name}"
+
+
+def store_asset(kind, stream, filename):
+    """Stream an upload to disk under its SHA-256 and return the stored name.
+
+    The body is hashed while it is copied to a temp file in the store, then
+    renamed into place, so identical uploads are stored once and memory use
+    does not depend on the file size.
+    """
+    ext = os.path.splitext(filename or "")[1].lower()
+    if ext == ".jpeg":
+        ext = ".jpg"
+    if ext not in KIND_EXTENSIONS.get(kind, ()):
+        allowed = ", ".join(sorted(KIND_EXTENSIONS.get(kind, ())))
+        raise InvalidAsset(f"Unsupported file type. Allowed: {allowed}")
+
+    tmp_dir = os.path.join(asset_root(), "tmp")
+    os.makedirs(tmp_dir, exist_ok=True)
+    digest = hashlib.sha256()
+    fd, tmp_path = tempfile.mkstemp(dir=tmp_dir)
+    try:
+        with os.fdopen(fd, "wb") as out:
+            while True:
+                chunk = stream.read(_CHUNK_SIZE)
+                if not chunk:
+                    break
+                digest.update(chunk)
+                out.write(chunk)
+
+        name = digest.hexdigest() + ext
+        path = asset_path(kind, name)
+        if os.path.exists(path):
+            os.unlink(tmp_path)
+        else:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.unlink(tmp_path)
+        raise
+    return name
+
+
+def ensure_thumbnail(name, size):
+    """Return the thumbnail path for cover ``name``, rendering it if missing.
+
+    Returns None when the cover does not exist or Pillow is unavailable.
+    """
+    if size not in THUMBNAIL_SIZES:
+        raise InvalidAsset("Unsupported thumbnail size")
+    source = asset_path("images", name)
+    target = thumbnail_path(name[:64], size)
+    if os.path.exists(target):
+        return target
+    if not os.path.exists(source):
+        return None
+    try:
+        from PIL import Image
+    except ImportError:
+        current_app.logger.warning("Pillow is not installed; cover thumbnails are disabled")
+        return None
+
+    os.makedirs(os.path.dirname(target), exist_ok=True)
+    with Image.open(source) as image:
+        image = image.convert("RGB")
+        image.thumbnail((size, size * 2))
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(target))
+        with os.fdopen(fd, "wb") as out:
+            image.save(out, "JPEG", quality=85, optimize=True)
+    os.replace(tmp_path, target)
+    return target
+
+
+def thumbnail_urls(img_url):
+    """Thumbnail URLs for a locally stored cover, or {} for external URLs."""
+    prefix = f"{ASSET_URL_PREFIX}/images/"
+    if not img_url or not img_url.startswith(prefix):
+        return {}
+    name = img_url[len(prefix):]
+    if not _NAME_RE.match(name):
+        return {}
+    return {str(size): f"{prefix}{name}/{size}.jpg" for size in THUMBNAIL_SIZES}
+
+
+def local_asset_name(kind, url):
+    """The stored name behind a local asset URL, or None for external URLs."""
+    prefix = f"{ASSET_URL_PREFIX}/{kind}/"
+    if not url or not url.startswith(prefix):
+        return None
+    name = url[len(prefix):]
+    return name if _NAME_RE.match(name) else None
+
+
+def _signature(name, expires):
+    key = current_app.config["DOWNLOAD_LINK_SECRET"].encode()
+    return hmac.new(key, f"files/{name}:{expires}".encode(), hashlib.sha256).hexdigest()
+
+
+def signed_file_url(name, ttl):
+    """Short-lived URL for a book file; verifiable from the URL alone."""
+    expires = int(time.time()) + ttl
+    return f"{asset_url('files', name)}?exp={expires}&sig={_signature(name, expires)}", expires
+
+
+def verify_file_signature(name, expires, signature):
+    try:
+        expires = int(expires)
+    except (TypeError, ValueError):
+        return False
+    if expires < time.time():
+        return False
+    return hmac.compare_digest(_signature(name, expires), signature or "")
+
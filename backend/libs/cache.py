@@ -0,0 +1,248 @@
+import hashlib
+import json
+import threading
+import time
+from collections import OrderedDict
+from functools import wraps
+
+from flask import current_app, request
+from sqlalchemy import event, update
+
+from models.models import db, Author, Book, CatalogState, CatalogTombstone
+
+CATALOG_STATE_ID = 1
+# Stock moves on every checkout, so it has its own counter: bumping the
+# catalog version for it would empty the response cache under order load
+STOCK_STATE_ID = 2
+# Above this many books a live stock lookup reads the whole table instead of
+# binding every id
+LIVE_STOCK_MAX_IDS = 500
+
+
+class ResponseCache:
+    """Thread-safe LRU of serialized responses, bounded by size and age.
+
+    Entries are keyed by the catalog version as well, so a write from any
+    worker process makes older entries unreachable; they age out via LRU/TTL.
+    """
+
+    def __init__(self, max_bytes, ttl):
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._size = 0
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            body, stored_at = entry
+            if time.monotonic() - stored_at > self.ttl:
+                self._remove(key)
+                return None
+            self._entries.move_to_end(key)
+            return body
+
+    def set(self, key, body):
+        if len(body) > self.max_bytes:
+            return
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = (body, time.monotonic())
+            self._size += len(body)
+            while self._size > self.max_bytes:
+                self._remove(next(iter(self._entries)))
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._size = 0
+
+    def _remove(self, key):
+        body, _ = self._entries.pop(key)
+        self._size -= len(body)
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_response_cache():
+    global _cache
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                _cache = ResponseCache(
+                    current_app.config["RESPONSE_CACHE_MAX_BYTES"],
+                    current_app.config["RESPONSE_CACHE_TTL"],
+                )
+    return _cache
+
+
+def ensure_catalog_state():
+    for state_id in (CATALOG_STATE_ID, STOCK_STATE_ID):
+        if not db.session.get(CatalogState, state_id):
+            db.session.add(CatalogState(id=state_id, version=0))
+    db.session.commit()
+
+
+def get_catalog_version():
+    return db.session.execute(
+        db.select(CatalogState.version).where(CatalogState.id == CATALOG_STATE_ID)
+    ).scalar()
+
+
+def _get_versions():
+    """(catalog version, stock version) in one query."""
+    versions = dict(db.session.execute(
+        db.select(CatalogState.id, CatalogState.version)
+        .where(CatalogState.id.in_((CATALOG_STATE_ID, STOCK_STATE_ID)))
+    ).all())
+    return versions[CATALOG_STATE_ID], versions.get(STOCK_STATE_ID, 0)
+
+
+def current_stock(book_ids):
+    """Current {book_id: (stock_quantity, reserved_quantity)} for ``book_ids``."""
+    book_ids = set(book_ids)
+    if not book_ids:
+        return {}
+    query = db.select(Book.id, Book.stock_quantity, Book.reserved_quantity)
+    if len(book_ids) <= LIVE_STOCK_MAX_IDS:
+        query = query.where(Book.id.in_(book_ids))
+    rows = db.session.execute(query)
+    return {book_id: (stock, reserved) for book_id, stock, reserved in rows if book_id in book_ids}
+
+
+def _book_dicts(payload):
+    """Every serialized book (a dict with stock_quantity) inside ``payload``."""
+    if isinstance(payload, list):
+        for item in payload:
+            yield from _book_dicts(item)
+    elif isinstance(payload, dict):
+        if "stock_quantity" in payload and "id" in payload:
+            yield payload
+        for value in payload.values():
+            if isinstance(value, (list, dict)):
+                yield from _book_dicts(value)
+
+
+def _with_live_stock(body):
+    payload = json.loads(body)
+    books = list(_book_dicts(payload))
+    stock = current_stock(book["id"] for book in books)
+    for book in books:
+        if book["id"] in stock:
+            quantity, reserved = stock[book["id"]]
+            book["stock_quantity"] = quantity
+            book["available_quantity"] = quantity - (reserved or 0)
+    return payload
+
+
+def cached_response(fn=None, *, live_stock=False, keyed_on_stock=None):
+    """Cache a JSON view per (endpoint, args, catalog version) with a strong ETag.
+
+    The ETag is derived from the versions and the key alone, so a matching
+    If-None-Match gets a 304 before the view runs or anything is serialized.
+
+    Stock changes do not touch the catalog version. Views that show stock
+    pass ``live_stock`` and have current figures patched into cached hits;
+    views whose result depends on stock (filters, counts) pass
+    ``keyed_on_stock``, a predicate on the request args, and are cached per
+    stock version while it holds.
+    """
+    if fn is None:
+        return lambda fn: cached_response(fn, live_stock=live_stock, keyed_on_stock=keyed_on_stock)
+
+    @wraps(fn)
+    def decorated_view(*args, **kwargs):
+        if not current_app.config["RESPONSE_CACHE_ENABLED"]:
+            return fn(*args, **kwargs)
+
+        version, stock_version = _get_versions()
+        keyed = keyed_on_stock is not None and keyed_on_stock(request.args)
+        key = (
+            version,
+            stock_version if keyed else None,
+            request.endpoint,
+            tuple(sorted(kwargs.items())),
+            tuple(sorted(request.args.items(multi=True))),
+        )
+        patched = live_stock and not keyed
+        etag = hashlib.sha1(repr((key, stock_version if patched else None)).encode()).hexdigest()
+
+        if request.if_none_match.contains(etag):
+            response = current_app.response_class(status=304)
+        else:
+            cache = get_response_cache()
+            body = cache.get(key)
+            if body is None:
+                response = current_app.make_response(fn(*args, **kwargs))
+                if response.status_code != 200:
+                    return response
+                cache.set(key, response.get_data())
+            elif patched:
+                response = current_app.json.response(_with_live_stock(body))
+            else:
+                response = current_app.response_class(body, mimetype="application/json")
+
+        response.set_etag(etag)
+        # Let browsers and the proxy store it but revalidate every time
+        response.headers["Cache-Control"] = "no-cache"
+        return response
+    return decorated_view
+
+
+# --- Invalidation ---
+# Any flushed Book/Author change bumps the version in the same transaction,
+# so it becomes visible to every process exactly when the write commits.
+# Changed rows are stamped with the new version and deletes leave a
+# tombstone, which is what /api/catalog/changes reads.
+
+def _bump(conn, state_id):
+    return conn.execute(
+        update(CatalogState)
+        .where(CatalogState.id == state_id)
+        .values(version=CatalogState.version + 1)
+        .returning(CatalogState.version)
+    ).scalar()
+
+
+def bump_catalog_version(conn):
+    """Increment and return the catalog version.
+
+    Also called directly by write paths that bypass the ORM (bulk Core inserts).
+    """
+    return _bump(conn, CATALOG_STATE_ID)
+
+
+def bump_stock_version(conn):
+    """Increment and return the stock version, for Core stock/reservation updates."""
+    return _bump(conn, STOCK_STATE_ID)
+
+
+@event.listens_for(db.session, "before_flush")
+def _stamp_catalog_changes(session, flush_context, instances):
+    changed = [
+        obj for obj in list(session.new) + list(session.dirty) + list(session.deleted)
+        if isinstance(obj, (Book, Author))
+        and (obj in session.new or obj in session.deleted or session.is_modified(obj))
+    ]
+    if not changed:
+        return
+
+    version = bump_catalog_version(session.connection())
+    for obj in changed:
+        if obj in session.deleted:
+            entity = "book" if isinstance(obj, Book) else "author"
+            session.add(CatalogTombstone(entity=entity, entity_id=obj.id, catalog_version=version))
+        else:
+            obj.catalog_version = version
+
+        # Books embed their authors' names, so an author edit changes them too
+        if isinstance(obj, Author) and obj not in session.new:
+            for book in obj.books:
+                if book not in session.deleted:
+                    book.catalog_version = version
@@ -0,0 +1,279 @@
+import csv
+import io
+import json
+from datetime import date
+
+from sqlalchemy import func, insert, select, text
+
+from models.models import db, Author, Book, book_author_association
+from libs.cache import bump_catalog_version
+from libs.search import reindex_book_range
+
+# Imported books join the search index in chunks of about this many rows
+# rather than batch by batch
+SEARCH_REINDEX_ROWS = 10000
+
+TRUE_VALUES = {"1", "true", "yes", "y"}
+FALSE_VALUES = {"0", "false", "no", "n", ""}
+
+
+class ImportReport:
+    """Running totals plus a capped list of per-row errors."""
+
+    def __init__(self, max_errors):
+        self.max_errors = max_errors
+        self.rows = 0
+        self.inserted = 0
+        self.failed = 0
+        self.authors_created = 0
+        self.errors = []
+
+    def error(self, row_number, message):
+        self.failed += 1
+        if len(self.errors) < self.max_errors:
+            self.errors.append({"row": row_number, "error": message})
+
+    def to_dict(self):
+        return {
+            "rows": self.rows,
+            "inserted": self.inserted,
+            "failed": self.failed,
+            "authors_created": self.authors_created,
+            "errors": self.errors,
+            "errors_truncated": self.failed > len(self.errors),
+        }
+
+
+def iter_records(stream, fmt):
+    """Yield (row_number, dict) lazily from a binary stream of CSV or JSONL.
+
+    Malformed JSONL lines are yielded as exceptions so they are reported
+    against their row instead of aborting the load.
+    """
+    text = io.TextIOWrapper(stream, encoding="utf-8-sig", newline="")
+    if fmt == "csv":
+        for row_number, row in enumerate(csv.DictReader(text), start=2):
+            yield row_number, row
+    elif fmt == "jsonl":
+        for row_number, line in enumerate(text, start=1):
+            if not line.strip():
+                continue
+            try:
+                record = json.loads(line)
+            except ValueError as e:
+                yield row_number, ValueError(f"Invalid JSON: {e}")
+                continue
+            if not isinstance(record, dict):
+                yield row_number, ValueError("Each line must be a JSON object")
+                continue
+            yield row_number, record
+    else:
+        raise ValueError("Unsupported format. Use csv or jsonl")
+
+
+def split_author_name(name):
+    parts = name.strip().rsplit(" ", 1)
+    if len(parts) == 1:
+        return parts[0], ""
+    return parts[0].strip(), parts[1]
+
+
+def _parse_authors(value):
+    if value is None:
+        return []
+    if isinstance(value, str):
+        names = value.split(";")
+    elif isinstance(value, list):
+        names = value
+    else:
+        raise ValueError("authors must be a list or a ';'-separated string")
+    authors = []
+    for name in names:
+        if not isinstance(name, str):
+            raise ValueError("author names must be strings")
+        if name.strip():
+            first_name, last_name = split_author_name(name)
+            if not last_name:
+                raise ValueError(f"Author '{name.strip()}' needs a first and last name")
+            authors.append((first_name, last_name))
+    return authors
+
+
+def _parse_bool(value):
+    if isinstance(value, bool):
+        return value
+    text = str(value or "").strip().lower()
+    if text in TRUE_VALUES:
+        return True
+    if text in FALSE_VALUES:
+        return False
+    raise ValueError(f"Invalid boolean value: {value}")
+
+
+def _parse_date(value):
+    # fromisoformat is several times faster than strptime but also takes
+    # YYYYMMDD and week dates, so the shape is checked first
+    if not (isinstance(value, str) and len(value) == 10 and value[4] == value[7] == "-"):
+        raise ValueError("Invalid date format. Use YYYY-MM-DD")
+    try:
+        return date.fromisoformat(value)
+    except ValueError:
+        raise ValueError("Invalid date format. Use YYYY-MM-DD")
+
+
+def parse_record(record):
+    """Validate one input record into column values and author names."""
+    title = (record.get("title") or "").strip()
+    if not title:
+        raise ValueError("Missing title")
+
+    try:
+        price = float(record.get("price"))
+    except (TypeError, ValueError):
+        raise ValueError("Invalid or missing price")
+
+    stock = record.get("stock_quantity") or 0
+    try:
+        stock = int(stock)
+    except (TypeError, ValueError):
+        raise ValueError("Invalid stock_quantity")
+
+    publication_date = None
+    if record.get("publication_date"):
+        publication_date = _parse_date(record["publication_date"])
+
+    book = {
+        "title": title,
+        "price": price,
+        "stock_quantity": stock,
+        "publication_date": publication_date,
+        "is_recommended": _parse_bool(record.get("is_recommended")),
+        "file_url": record.get("file_url") or None,
+        "img_url": record.get("img_url") or None,
+    }
+    return book, _parse_authors(record.get("authors"))
+
+
+class CatalogImporter:
+    """Insert books and upsert their authors in batched executemany transactions.
+
+    Only one batch of rows is held in memory at a time. Core inserts bypass
+    the ORM flush hooks, so each batch bumps the catalog version and stamps
+    its rows with it, and the importer refreshes the search index itself,
+    every SEARCH_REINDEX_ROWS rows and once more at the end. A load killed
+    part way can leave that many committed books out of search until
+    libs.search.rebuild_search_index runs.
+    """
+
+    def __init__(self, batch_size=1000, max_errors=1000):
+        self.batch_size = batch_size
+        self.report = ImportReport(max_errors)
+        self._author_ids = None
+        self._next_ids = None
+        self._unindexed_from = None
+
+    def run(self, records):
+        self._load_state()
+        batch = []
+        for row_number, record in records:
+            self.report.rows += 1
+            if isinstance(record, Exception):
+                self.report.error(row_number, str(record))
+                continue
+            try:
+                batch.append((row_number,) + parse_record(record))
+            except ValueError as e:
+                self.report.error(row_number, str(e))
+                continue
+            if len(batch) >= self.batch_size:
+                self._flush(batch)
+                batch = []
+        if batch:
+            self._flush(batch)
+        if self._unindexed_from is not None:
+            # Search responses are cached per catalog version
+            conn = db.session.connection()
+            bump_catalog_version(conn)
+            reindex_book_range(conn, self._unindexed_from, self._next_ids[Book] - 1)
+            db.session.commit()
+        return self.report
+
+    def _load_state(self):
+        rows = db.session.execute(select(Author.id, Author.first_name, Author.last_name))
+        self._author_ids = {(first, last): author_id for author_id, first, last in rows}
+        conn = db.session.connection()
+        self._next_ids = {Author: _next_id(conn, Author), Book: _next_id(conn, Book)}
+
+    def _flush(self, batch):
+        conn = db.session.connection()
+        try:
+            version = bump_catalog_version(conn)
+            new_authors = list(dict.fromkeys(
+                name for _, _, names in batch for name in names if name not in self._author_ids
+            ))
+            if new_authors:
+                first_id = self._next_ids[Author]
+                created = range(first_id, first_id + len(new_authors))
+                conn.execute(insert(Author), [
+                    {"id": author_id, "first_name": first, "last_name": last, "catalog_version": version}
+                    for author_id, (first, last) in zip(created, new_authors)
+                ])
+                self._author_ids.update(zip(new_authors, created))
+
+            # Ids are assigned up front so the inserts run as one executemany
+            # instead of row-by-row RETURNING; a concurrent writer taking the
+            # same ids fails the batch on the primary key rather than mixing rows.
+            first_id = self._next_ids[Book]
+            book_ids = range(first_id, first_id + len(batch))
+            conn.execute(insert(Book), [
+                dict(book, id=book_id, catalog_version=version) for book_id, (_, book, _) in zip(book_ids, batch)
+            ])
+
+            links = [
+                {"book_id": book_id, "author_id": self._author_ids[name]}
+                for book_id, (_, _, names) in zip(book_ids, batch)
+                for name in dict.fromkeys(names)
+            ]
+            if links:
+                conn.execute(insert(book_author_association), links)
+
+            # Ids are contiguous, so the books still missing from the index
+            # are one range; ids in it that another writer took are simply
+            # indexed again
+            unindexed_from = book_ids[0] if self._unindexed_from is None else self._unindexed_from
+            if book_ids[-1] - unindexed_from + 1 >= SEARCH_REINDEX_ROWS:
+                reindex_book_range(conn, unindexed_from, book_ids[-1])
+                unindexed_from = None
+            db.session.commit()
+        except Exception as e:
+            db.session.rollback()
+            # Forget authors and ids used by the rolled back transaction
+            self._load_state()
+            for row_number, _, _ in batch:
+                self.report.error(row_number, f"Batch failed: {e}")
+            return
+
+        self._next_ids[Author] += len(new_authors)
+        self._next_ids[Book] += len(book_ids)
+        self._unindexed_from = unindexed_from
+        self.report.inserted += len(book_ids)
+        self.report.authors_created += len(new_authors)
+
+
+def _next_id(conn, model):
+    # Above the AUTOINCREMENT sequence too, so ids of deleted rows stay unused
+    used = conn.execute(select(func.coalesce(func.max(model.id), 0))).scalar()
+    seq = conn.execute(
+        text("SELECT seq FROM sqlite_sequence WHERE name = :name"), {"name": model.__tablename__}
+    ).scalar()
+    return max(used, seq or 0) + 1
+
+
+def detect_format(fmt, filename):
+    if fmt:
+        return fmt.lower()
+    if filename and filename.lower().endswith(".csv"):
+        return "csv"
+    if filename and filename.lower().endswith((".jsonl", ".ndjson")):
+        return "jsonl"
+    return None
@@ -0,0 +1,58 @@
+from sqlalchemy import update
+from sqlalchemy.dialects.sqlite import insert
+
+from models.models import db, BookEntitlement
+from libs.archive import live_order_lines
+
+
+def grant(user_id, book_ids):
+    """Count one more live order containing each of ``book_ids``."""
+    book_ids = set(book_ids)
+    if not book_ids:
+        return
+    table = BookEntitlement.__table__
+    stmt = insert(table).values(
+        [{"user_id": user_id, "book_id": book_id, "order_count": 1} for book_id in book_ids]
+    )
+    db.session.connection().execute(stmt.on_conflict_do_update(
+        index_elements=["user_id", "book_id"],
+        set_={"order_count": table.c.order_count + 1},
+    ))
+
+
+def revoke(user_id, book_ids):
+    """Undo :func:`grant`, e.g. when an order is Cancelled."""
+    book_ids = set(book_ids)
+    if not book_ids:
+        return
+    db.session.execute(
+        update(BookEntitlement)
+        .where(
+            BookEntitlement.user_id == user_id,
+            BookEntitlement.book_id.in_(book_ids),
+            BookEntitlement.order_count > 0,
+        )
+        .values(order_count=BookEntitlement.order_count - 1)
+    )
+
+
+def owns_book(user_id, book_id):
+    entitlement = db.session.get(BookEntitlement, (user_id, book_id))
+    return bool(entitlement and entitlement.order_count > 0)
+
+
+def rebuild_entitlements():
+    """Recompute the whole index from order history, archive included (backfill/repair)."""
+    db.session.execute(BookEntitlement.__table__.delete())
+    lines = live_order_lines()
+    rows = db.session.execute(
+        db.select(lines.c.user_id, lines.c.book_id, db.func.count(db.distinct(lines.c.order_id)))
+        .group_by(lines.c.user_id, lines.c.book_id)
+    ).all()
+    if rows:
+        db.session.execute(
+            BookEntitlement.__table__.insert(),
+            [{"user_id": u, "book_id": b, "order_count": n} for u, b, n in rows],
+        )
+    db.session.commit()
+    return len(rows)
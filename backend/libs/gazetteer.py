@@ -0,0 +1,213 @@
+import bisect
+import csv
+import io
+import json
+import mmap
+import os
+import struct
+import threading
+
+from flask import current_app
+
+# Packed, read-only gazetteer of Thai sub-districts, memory-mapped at startup.
+#
+#   header   | magic, version, string/entry/key counts, string bytes
+#   offsets  | (n_strings + 1) x u32, start of each string in the blob
+#   strings  | UTF-8 blob of display names and normalized search keys
+#   entries  | n_entries x (sub_district, district, province, postal_code),
+#            | string ids plus the postal code as u32, sorted by postal code
+#   keys     | n_keys x (key string id, entry id), sorted by key bytes
+#
+# Postal-code lookups are a binary search over ``entries`` and autocomplete is
+# a binary search for the first key with the prefix, then a forward scan. No
+# Python objects are built per row at load time, so loading is an mmap call
+# and the pages are shared between worker processes.
+
+MAGIC = b"THGZ"
+VERSION = 1
+_HEADER = struct.Struct("<4sHHIIII")
+_ENTRY = struct.Struct("<IIII")
+_KEY = struct.Struct("<II")
+
+# Prefixes people type in front of names ("ตำบล", "อ.", ...) and names with
+# common short forms; both are normalized away before matching
+_PREFIXES = ("จังหวัด", "อำเภอ", "ตำบล", "แขวง", "เขต", "จ.", "อ.", "ต.")
+_ALIASES = {
+    "กรุงเทพ": "กรุงเทพมหานคร",
+    "กรุงเทพฯ": "กรุงเทพมหานคร",
+    "กทม": "กรุงเทพมหานคร",
+    "กทม.": "กรุงเทพมหานคร",
+}
+
+
+class InvalidAddress(ValueError):
+    pass
+
+
+def normalize(name):
+    text = "".join((name or "").split()).lower()
+    for prefix in _PREFIXES:
+        if text.startswith(prefix) and len(text) > len(prefix):
+            text = text[len(prefix):]
+            break
+    return _ALIASES.get(text, text)
+
+
+def build_gazetteer(rows, path):
+    """Pack (sub_district, district, province, postal_code) rows into ``path``."""
+    rows = sorted({
+        (sub.strip(), district.strip(), province.strip(), int(postal_code))
+        for sub, district, province, postal_code in rows
+    }, key=lambda row: (row[3], row[2], row[1], row[0]))
+
+    strings, string_ids = [], {}
+
+    def string_id(text):
+        if text not in string_ids:
+            string_ids[text] = len(strings)
+            strings.append(text)
+        return string_ids[text]
+
+    entries, keys = [], set()
+    for entry_id, (sub, district, province, postal_code) in enumerate(rows):
+        entries.append((string_id(sub), string_id(district), string_id(province), postal_code))
+        for name in (sub, district, province, str(postal_code)):
+            keys.add((normalize(name), entry_id))
+
+    # Sorted before ids are assigned, so the same rows always pack into the
+    # same bytes
+    key_rows = sorted(keys, key=lambda key: (key[0].encode(), key[1]))
+    for key, _ in key_rows:
+        string_id(key)
+
+    blob = io.BytesIO()
+    offsets = [0]
+    for text in strings:
+        blob.write(text.encode())
+        offsets.append(blob.tell())
+
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "wb") as out:
+        out.write(_HEADER.pack(MAGIC, VERSION, 0, len(strings), len(entries), len(key_rows), blob.tell()))
+        out.write(struct.pack(f"<{len(offsets)}I", *offsets))
+        out.write(blob.getvalue())
+        for entry in entries:
+            out.write(_ENTRY.pack(*entry))
+        for key, entry_id in key_rows:
+            out.write(_KEY.pack(string_ids[key], entry_id))
+    os.replace(tmp_path, path)
+    return len(entries)
+
+
+def read_source_rows(path):
+    """Rows from a CSV (sub_district,district,province,postal_code) or from the
+    JSON list used by the common open Thai address databases
+    ({"district": tambon, "amphoe": ..., "province": ..., "zipcode": ...})."""
+    with open(path, encoding="utf-8-sig") as source:
+        if path.endswith(".json"):
+            for row in json.load(source):
+                yield row["district"], row["amphoe"], row["province"], row["zipcode"]
+        else:
+            for row in csv.DictReader(source):
+                yield row["sub_district"], row["district"], row["province"], row["postal_code"]
+
+
+class Gazetteer:
+    def __init__(self, path):
+        with open(path, "rb") as source:
+            self._map = mmap.mmap(source.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, _, n_strings, n_entries, n_keys, string_bytes = _HEADER.unpack_from(self._map, 0)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError(f"{path} is not a version {VERSION} gazetteer file")
+
+        self._offsets_at = _HEADER.size
+        self._strings_at = self._offsets_at + (n_strings + 1) * 4
+        self._entries_at = self._strings_at + string_bytes
+        self._keys_at = self._entries_at + n_entries * _ENTRY.size
+        self.size = n_entries
+        self._n_keys = n_keys
+
+    def _string_bytes(self, string_id):
+        start, end = struct.unpack_from("<II", self._map, self._offsets_at + string_id * 4)
+        return self._map[self._strings_at + start:self._strings_at + end]
+
+    def _entry(self, entry_id):
+        return _ENTRY.unpack_from(self._map, self._entries_at + entry_id * _ENTRY.size)
+
+    def _key(self, index):
+        return _KEY.unpack_from(self._map, self._keys_at + index * _KEY.size)
+
+    def _key_bytes(self, index):
+        return self._string_bytes(self._key(index)[0])
+
+    def _postal_code(self, entry_id):
+        return self._entry(entry_id)[3]
+
+    def entry(self, entry_id):
+        sub, district, province, postal_code = self._entry(entry_id)
+        return {
+            "sub_district": self._string_bytes(sub).decode(),
+            "district": self._string_bytes(district).decode(),
+            "province": self._string_bytes(province).decode(),
+            "postal_code": f"{postal_code:05d}",
+        }
+
+    def by_postal_code(self, postal_code):
+        code = str(postal_code or "").strip()
+        if len(code) != 5 or not code.isdigit():
+            return []
+        code = int(code)
+        entries = range(self.size)
+        first = bisect.bisect_left(entries, code, key=self._postal_code)
+        last = bisect.bisect_right(entries, code, lo=first, key=self._postal_code)
+        return [self.entry(i) for i in range(first, last)]
+
+    def autocomplete(self, q, limit=10):
+        prefix = normalize(q).encode()
+        if not prefix:
+            return []
+        seen, results = set(), []
+        index = bisect.bisect_left(range(self._n_keys), prefix, key=self._key_bytes)
+        while index < self._n_keys and len(results) < limit:
+            key_id, entry_id = self._key(index)
+            if not self._string_bytes(key_id).startswith(prefix):
+                break
+            if entry_id not in seen:
+                seen.add(entry_id)
+                results.append(self.entry(entry_id))
+            index += 1
+        return results
+
+    def validate(self, sub_district, district, province, postal_code, strict=False):
+        """Raise InvalidAddress unless the four fields name a real sub-district.
+
+        A postal code missing from the gazetteer is only an error when
+        ``strict``, so a partial data file never blocks real addresses.
+        """
+        candidates = self.by_postal_code(postal_code)
+        if not candidates:
+            if strict:
+                raise InvalidAddress(f"Unknown postal code: {postal_code}")
+            return
+        wanted = (normalize(sub_district), normalize(district), normalize(province))
+        for entry in candidates:
+            if (normalize(entry["sub_district"]), normalize(entry["district"]), normalize(entry["province"])) == wanted:
+                return
+        raise InvalidAddress(
+            f"Postal code {postal_code} does not match {sub_district}, {district}, {province}"
+        )
+
+
+_gazetteer = None
+_gazetteer_lock = threading.Lock()
+
+
+def get_gazetteer():
+    """The loaded gazetteer, or None when GEO_GAZETTEER_PATH does not exist."""
+    global _gazetteer
+    if _gazetteer is None:
+        with _gazetteer_lock:
+            path = current_app.config["GEO_GAZETTEER_PATH"]
+            if _gazetteer is None and os.path.exists(path):
+                _gazetteer = Gazetteer(path)
+    return _gazetteer
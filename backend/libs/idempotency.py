@@ -0,0 +1,138 @@
+import hashlib
+import time
+from datetime import datetime, timedelta
+from functools import wraps
+
+from flask import current_app, jsonify, make_response, request
+from flask_jwt_extended import get_jwt_identity
+from sqlalchemy import delete, update
+from sqlalchemy.exc import IntegrityError, OperationalError
+
+from models.models import db, IdempotencyRecord
+
+HEADER = "Idempotency-Key"
+MAX_KEY_LENGTH = 255
+_POLL_INTERVAL = 0.05
+_PRUNE_INTERVAL = 60  # seconds between expired-record sweeps per process
+
+_last_prune = 0.0
+
+
+def _request_hash():
+    return hashlib.sha256(request.get_data()).hexdigest()
+
+
+def _prune(now):
+    global _last_prune
+    if time.monotonic() - _last_prune < _PRUNE_INTERVAL:
+        return
+    _last_prune = time.monotonic()
+    cutoff = now - timedelta(seconds=current_app.config["IDEMPOTENCY_TTL"])
+    db.session.execute(delete(IdempotencyRecord).where(IdempotencyRecord.created_at < cutoff))
+    # Its own transaction: a claim that loses the insert race rolls back,
+    # which would otherwise discard the sweep until the next interval
+    db.session.commit()
+
+
+def _claim(user_id, key, request_hash):
+    """Insert an in-progress record; True if this request now owns the key.
+
+    The primary key makes the insert the lock: of concurrent duplicates only
+    one commits, the rest see an IntegrityError and wait for its response.
+    A claim left unfinished past IDEMPOTENCY_LOCK_TIMEOUT (crashed worker)
+    or an expired record is taken over instead.
+    """
+    now = datetime.utcnow()
+    _prune(now)
+    db.session.add(IdempotencyRecord(user_id=user_id, key=key, request_hash=request_hash, created_at=now))
+    try:
+        db.session.commit()
+        return True
+    except IntegrityError:
+        db.session.rollback()
+
+    stale = now - timedelta(seconds=current_app.config["IDEMPOTENCY_LOCK_TIMEOUT"])
+    expired = now - timedelta(seconds=current_app.config["IDEMPOTENCY_TTL"])
+    taken = db.session.execute(
+        update(IdempotencyRecord)
+        .where(
+            IdempotencyRecord.user_id == user_id,
+            IdempotencyRecord.key == key,
+            ((IdempotencyRecord.status_code.is_(None)) & (IdempotencyRecord.created_at < stale))
+            | (IdempotencyRecord.created_at < expired),
+        )
+        .values(request_hash=request_hash, status_code=None, response=None, created_at=now)
+    )
+    db.session.commit()
+    return taken.rowcount == 1
+
+
+def _wait_for_response(user_id, key):
+    deadline = time.monotonic() + current_app.config["IDEMPOTENCY_WAIT"]
+    while True:
+        record = db.session.get(IdempotencyRecord, (user_id, key), populate_existing=True)
+        db.session.commit()
+        if record is None or record.status_code is not None or time.monotonic() >= deadline:
+            return record
+        time.sleep(_POLL_INTERVAL)
+
+
+def _replay(record):
+    response = make_response(jsonify(record.response), record.status_code)
+    response.headers["Idempotent-Replayed"] = "true"
+    return response
+
+
+def idempotent(fn):
+    """Honour an optional Idempotency-Key header on a JWT-protected view.
+
+    The first response for a (user, key) pair is stored for IDEMPOTENCY_TTL
+    and returned as-is to retries, without running the view again. 5xx
+    responses are not stored, so the client can retry them.
+    """
+    @wraps(fn)
+    def decorated_view(*args, **kwargs):
+        key = request.headers.get(HEADER)
+        if key is None:
+            return fn(*args, **kwargs)
+        if not key or len(key) > MAX_KEY_LENGTH:
+            return jsonify({"msg": f"{HEADER} must be 1-{MAX_KEY_LENGTH} characters"}), 400
+
+        user_id = get_jwt_identity()
+        request_hash = _request_hash()
+        try:
+            owned = _claim(user_id, key, request_hash)
+            record = None if owned else _wait_for_response(user_id, key)
+        except OperationalError as e:
+            db.session.rollback()
+            return jsonify({"msg": "Checkout is busy, please try again", "error": str(e.orig)}), 503
+
+        if not owned:
+            if record is None:
+                return jsonify({"msg": f"Previous request with this {HEADER} failed, please retry"}), 409
+            if record.request_hash != request_hash:
+                return jsonify({"msg": f"{HEADER} was already used for a different request"}), 422
+            if record.status_code is None:
+                return jsonify({"msg": f"A request with this {HEADER} is still in progress"}), 409
+            return _replay(record)
+
+        response = make_response(fn(*args, **kwargs))
+        try:
+            if response.status_code >= 500:
+                db.session.execute(delete(IdempotencyRecord).where(
+                    IdempotencyRecord.user_id == user_id, IdempotencyRecord.key == key,
+                ))
+            else:
+                db.session.execute(
+                    update(IdempotencyRecord)
+                    .where(IdempotencyRecord.user_id == user_id, IdempotencyRecord.key == key)
+                    .values(status_code=response.status_code, response=response.get_json())
+                )
+            db.session.commit()
+        except OperationalError as e:
+            # The order itself is committed; a retry will wait out the lock timeout
+            db.session.rollback()
+            current_app.logger.warning(f"Could not store idempotent response for key {key!r}: {e}")
+        return response
+
+    return decorated_view
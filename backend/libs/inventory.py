@@ -0,0 +1,245 @@
+import threading
+import time
+from collections import Counter
+from datetime import datetime, timedelta
+
+from sqlalchemy import bindparam, delete, func, update
+
+from models.models import db, Book, Reservation
+from libs.cache import bump_stock_version
+
+_book = Book.__table__
+_available = _book.c.stock_quantity - _book.c.reserved_quantity
+
+# Every stock mutation is one conditional UPDATE per book, sent as a single
+# executemany. A row only changes if enough unreserved stock is left at the
+# moment of the write, so concurrent checkouts can never both take the last
+# copy; a short rowcount means a conflict.
+_DECREMENT = (
+    update(_book)
+    .where(_book.c.id == bindparam("b_id"), _available >= bindparam("qty"))
+    .values(
+        stock_quantity=_book.c.stock_quantity - bindparam("qty"),
+    )
+)
+_RESERVE = (
+    update(_book)
+    .where(_book.c.id == bindparam("b_id"), _available >= bindparam("qty"))
+    .values(
+        reserved_quantity=_book.c.reserved_quantity + bindparam("qty"),
+    )
+)
+_RELEASE = (
+    update(_book)
+    .where(_book.c.id == bindparam("b_id"), _book.c.reserved_quantity >= bindparam("qty"))
+    .values(
+        reserved_quantity=_book.c.reserved_quantity - bindparam("qty"),
+    )
+)
+# Fallback when a hold's books no longer have its copies reserved (changed
+# behind it): clear whatever part is still reserved, never going below zero
+_RELEASE_REMAINING = (
+    update(_book)
+    .where(_book.c.id == bindparam("b_id"))
+    .values(reserved_quantity=func.max(_book.c.reserved_quantity - bindparam("qty"), 0))
+)
+_CONVERT = (
+    update(_book)
+    .where(_book.c.id == bindparam("b_id"), _book.c.reserved_quantity >= bindparam("qty"))
+    .values(
+        stock_quantity=_book.c.stock_quantity - bindparam("qty"),
+        reserved_quantity=_book.c.reserved_quantity - bindparam("qty"),
+    )
+)
+
+
+class OutOfStock(Exception):
+    def __init__(self, title, available, requested):
+        super().__init__(
+            f"Insufficient stock for '{title}'. Available: {available}, Requested: {requested}"
+        )
+
+
+def quantities_by_book(lines):
+    """Sum quantities per book, so repeated cart lines are checked together."""
+    totals = Counter()
+    for book_id, quantity in lines:
+        totals[book_id] += quantity
+    return totals
+
+
+def check_stock(books, quantities):
+    """Cheap pre-check against the loaded snapshot, before taking write locks."""
+    for book_id, quantity in quantities.items():
+        book = books[book_id]
+        if book.available_quantity < quantity:
+            raise OutOfStock(book.title, book.available_quantity, quantity)
+
+
+def _apply(stmt, quantities):
+    if not quantities:
+        return True
+    result = db.session.connection().execute(stmt, [
+        {"b_id": book_id, "qty": quantity}
+        for book_id, quantity in quantities.items()
+    ])
+    return result.rowcount == len(quantities)
+
+
+def _apply_each(stmt, quantities):
+    """Like _apply, one book at a time; returns the quantities whose row did not match."""
+    conn = db.session.connection()
+    missed = {}
+    for book_id, quantity in quantities.items():
+        if conn.execute(stmt, {"b_id": book_id, "qty": quantity}).rowcount != 1:
+            missed[book_id] = quantity
+    return missed
+
+
+def _raise_conflict(quantities):
+    db.session.rollback()
+    books = {book.id: book for book in Book.query.filter(Book.id.in_(quantities.keys()))}
+    for book_id, quantity in quantities.items():
+        book = books.get(book_id)
+        if not book:
+            raise OutOfStock(f"book {book_id}", 0, quantity)
+        if book.available_quantity < quantity:
+            raise OutOfStock(book.title, book.available_quantity, quantity)
+    raise OutOfStock("one or more books", 0, sum(quantities.values()))
+
+
+def decrement_stock(quantities):
+    """Atomically take ``quantities`` from unreserved stock in the current transaction.
+
+    Bypasses the ORM, so it bumps the stock version itself; stock changes
+    leave the catalog version alone (see libs.cache). Raises OutOfStock
+    (after rolling back) if any book ran out.
+    """
+    bump_stock_version(db.session.connection())
+    if not _apply(_DECREMENT, quantities):
+        _raise_conflict(quantities)
+
+
+# --- Reservations ---
+# Starting checkout moves quantities from available to reserved for a TTL.
+# Placing the order converts them into a stock decrement; anything not
+# converted is released by the order, by the user or by the sweeper.
+
+def active_reservation(user_id, reservation_id):
+    """The caller's unexpired hold, or None.
+
+    An expired hold of the caller's is released on the spot rather than left
+    for the sweeper, so its copies count as available for this checkout.
+    """
+    reservation = db.session.get(Reservation, reservation_id)
+    if not reservation or reservation.user_id != user_id:
+        return None
+    if reservation.expires_at <= datetime.utcnow():
+        release_reservation(reservation)
+        return None
+    return reservation
+
+
+def reserve_stock(user_id, lines, ttl):
+    """Hold ``lines`` for ``ttl`` seconds, replacing the user's previous hold."""
+    for reservation in Reservation.query.filter_by(user_id=user_id).all():
+        release_reservation(reservation)
+
+    quantities = quantities_by_book(lines)
+    bump_stock_version(db.session.connection())
+    if not _apply(_RESERVE, quantities):
+        _raise_conflict(quantities)
+
+    reservation = Reservation(
+        user_id=user_id,
+        expires_at=datetime.utcnow() + timedelta(seconds=ttl),
+        items=dict(quantities),
+    )
+    db.session.add(reservation)
+    return reservation
+
+
+def release_reservation(reservation):
+    """Give the held quantities back. Safe to race: only one caller deletes the row."""
+    deleted = db.session.execute(
+        delete(Reservation).where(Reservation.id == reservation.id),
+        execution_options={"synchronize_session": False},
+    )
+    if deleted.rowcount != 1:
+        return
+    bump_stock_version(db.session.connection())
+    _apply(_RELEASE, reservation.quantities())
+
+
+def convert_reservation(reservation, quantities):
+    """Turn a hold into a stock decrement for an order of ``quantities``.
+
+    Reserved copies are converted, anything ordered beyond the hold is taken
+    from available stock, and reserved copies not ordered are released.
+    """
+    deleted = db.session.execute(
+        delete(Reservation).where(Reservation.id == reservation.id),
+        execution_options={"synchronize_session": False},
+    )
+    if deleted.rowcount != 1:
+        # Swept or used concurrently; fall back to a plain checkout
+        decrement_stock(quantities)
+        return
+
+    held = reservation.quantities()
+    convert = {b: min(q, held[b]) for b, q in quantities.items() if held.get(b)}
+    extra = {b: q - convert.get(b, 0) for b, q in quantities.items() if q > convert.get(b, 0)}
+    unused = {b: q - convert.get(b, 0) for b, q in held.items() if q > convert.get(b, 0)}
+
+    bump_stock_version(db.session.connection())
+    # Copies that are no longer reserved cannot be converted; they must come
+    # out of available stock like any other checkout, or the order would
+    # commit without taking stock
+    for book_id, quantity in _apply_each(_CONVERT, convert).items():
+        _apply(_RELEASE_REMAINING, {book_id: quantity})
+        extra[book_id] = extra.get(book_id, 0) + quantity
+    _apply(_RELEASE_REMAINING, _apply_each(_RELEASE, unused))
+    if not _apply(_DECREMENT, extra):
+        _raise_conflict(extra)
+
+
+SWEEP_BATCH_SIZE = 500
+
+
+def sweep_expired_reservations(batch_size=SWEEP_BATCH_SIZE):
+    """Release expired holds; returns how many were reclaimed."""
+    expired = (
+        Reservation.query
+        .filter(Reservation.expires_at <= datetime.utcnow())
+        .order_by(Reservation.expires_at)
+        .limit(batch_size)
+        .all()
+    )
+    for reservation in expired:
+        release_reservation(reservation)
+    db.session.commit()
+    return len(expired)
+
+
+def start_reservation_sweeper(app):
+    """Run the sweeper on a daemon thread in this process.
+
+    Every worker may run one; release_reservation() is idempotent, so
+    overlapping sweeps cannot release a hold twice.
+    """
+    interval = app.config["RESERVATION_SWEEP_INTERVAL"]
+
+    def run():
+        while True:
+            time.sleep(interval)
+            with app.app_context():
+                try:
+                    while sweep_expired_reservations() == SWEEP_BATCH_SIZE:
+                        pass
+                except Exception as e:
+                    db.session.rollback()
+                    app.logger.warning(f"Reservation sweep failed: {e}")
+
+    thread = threading.Thread(target=run, name="reservation-sweeper", daemon=True)
+    thread.start()
+    return thread
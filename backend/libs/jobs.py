@@ -0,0 +1,157 @@
+import threading
+import traceback
+from datetime import datetime, timedelta
+
+from flask import current_app
+from sqlalchemy import delete, select, update
+
+from models.models import db, Job
+
+# Jobs are rows in the ``job`` table, inserted in the same transaction as the
+# change that needs them, so they exist exactly when that change committed.
+# Workers claim one row at a time with a conditional UPDATE, run the task and
+# delete the row in the task's own transaction. A worker that dies mid-job
+# leaves a stale claim that is retried after JOB_LOCK_TIMEOUT, so delivery is
+# at-least-once: tasks must be safe to run again.
+
+_TASKS = {}
+
+
+def task(name):
+    """Register a function as the handler for jobs called ``name``."""
+    def wrapper(fn):
+        _TASKS[name] = fn
+        return fn
+    return wrapper
+
+
+def enqueue(name, delay=0, **payload):
+    """Add a job to the current session; it runs once the session commits."""
+    if name not in _TASKS:
+        raise ValueError(f"Unknown job '{name}'")
+    job = Job(name=name, payload=payload, run_at=datetime.utcnow() + timedelta(seconds=delay))
+    db.session.add(job)
+    return job
+
+
+def _claim():
+    now = datetime.utcnow()
+    next_id = (
+        select(Job.id)
+        .where(Job.status == "pending", Job.run_at <= now)
+        .order_by(Job.run_at, Job.id)
+        .limit(1)
+        .scalar_subquery()
+    )
+    job_id = db.session.execute(
+        update(Job)
+        .where(Job.id == next_id, Job.status == "pending")
+        .values(status="running", locked_at=now, attempts=Job.attempts + 1)
+        .returning(Job.id)
+    ).scalar()
+    db.session.commit()
+    return db.session.get(Job, job_id) if job_id else None
+
+
+def requeue_stale_jobs():
+    """Hand jobs claimed by a worker that died back to the queue."""
+    stale = datetime.utcnow() - timedelta(seconds=current_app.config["JOB_LOCK_TIMEOUT"])
+    result = db.session.execute(
+        update(Job)
+        .where(Job.status == "running", Job.locked_at < stale)
+        .values(status="pending", locked_at=None)
+    )
+    db.session.commit()
+    return result.rowcount
+
+
+def _run(job):
+    name, payload, attempts = job.name, job.payload, job.attempts
+    job_id, locked_at = job.id, job.locked_at
+    try:
+        handler = _TASKS.get(name)
+        if handler is None:
+            raise LookupError(f"No handler registered for job '{name}'")
+        handler(**payload)
+        # Only the current claim may finish the job; if it was requeued and
+        # taken by another worker meanwhile, drop this run's database writes
+        finished = db.session.execute(
+            delete(Job).where(Job.id == job_id, Job.locked_at == locked_at)
+        )
+        if finished.rowcount != 1:
+            db.session.rollback()
+            return False
+        db.session.commit()
+        return True
+    except Exception:
+        db.session.rollback()
+        error = traceback.format_exc(limit=5)
+
+    if attempts >= current_app.config["JOB_MAX_ATTEMPTS"]:
+        values = {"status": "failed", "locked_at": None, "last_error": error}
+        current_app.logger.error(f"Job {job_id} ({name}) failed after {attempts} attempts")
+    else:
+        backoff = current_app.config["JOB_RETRY_BACKOFF"] * (2 ** (attempts - 1))
+        values = {
+            "status": "pending",
+            "locked_at": None,
+            "last_error": error,
+            "run_at": datetime.utcnow() + timedelta(seconds=backoff),
+        }
+    db.session.execute(update(Job).where(Job.id == job_id).values(**values))
+    db.session.commit()
+    return False
+
+
+def run_pending_jobs(limit=None):
+    """Run due jobs in this thread until none are left (or ``limit`` ran)."""
+    ran = 0
+    while limit is None or ran < limit:
+        job = _claim()
+        if job is None:
+            break
+        _run(job)
+        ran += 1
+    return ran
+
+
+def _worker_loop(app, stop):
+    interval = app.config["JOB_POLL_INTERVAL"]
+    while not stop.is_set():
+        with app.app_context():
+            try:
+                ran = run_pending_jobs(limit=100)
+            except Exception as e:
+                db.session.rollback()
+                app.logger.warning(f"Job worker error: {e}")
+                ran = 0
+        if not ran:
+            stop.wait(interval)
+
+
+def _stale_job_loop(app, stop):
+    interval = app.config["JOB_LOCK_TIMEOUT"] / 2
+    while not stop.wait(interval):
+        with app.app_context():
+            try:
+                requeue_stale_jobs()
+            except Exception as e:
+                db.session.rollback()
+                app.logger.warning(f"Requeueing stale jobs failed: {e}")
+
+
+def start_job_workers(app, threads=None, stop=None):
+    """Start ``threads`` daemon worker threads (default JOB_WORKER_THREADS).
+
+    Returns the threads and the Event that stops them.
+    """
+    threads = threads or app.config["JOB_WORKER_THREADS"]
+    stop = stop or threading.Event()
+    workers = [
+        threading.Thread(target=_worker_loop, args=(app, stop), name=f"job-worker-{i}", daemon=True)
+        for i in range(threads)
+    ]
+    workers.append(threading.Thread(target=_stale_job_loop, args=(app, stop), name="job-requeue", daemon=True))
+    for worker in workers:
+        worker.start()
+    return workers, stop
@@ -0,0 +1,124 @@
+import base64
+import json
+from datetime import date, datetime
+
+from flask import current_app
+from sqlalchemy import and_, tuple_
+
+
+class InvalidCursor(ValueError):
+    pass
+
+
+def encode_cursor(payload):
+    raw = json.dumps(payload, separators=(",", ":"), default=_json_default)
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(token):
+    try:
+        padded = token + "=" * (-len(token) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode()))
+    except (ValueError, TypeError):
+        raise InvalidCursor("Malformed cursor")
+    if not isinstance(payload, dict):
+        raise InvalidCursor("Malformed cursor")
+    return payload
+
+
+def _json_default(value):
+    if isinstance(value, (date, datetime)):
+        return value.isoformat()
+    raise TypeError(f"Cannot encode {type(value).__name__} in cursor")
+
+
+def page_size(args, default_key="CATALOG_PAGE_SIZE", max_key="CATALOG_MAX_PAGE_SIZE"):
+    """Read ?limit= and clamp it to the configured cap."""
+    default = current_app.config[default_key]
+    maximum = current_app.config[max_key]
+    try:
+        limit = int(args.get("limit", default))
+    except (TypeError, ValueError):
+        raise InvalidCursor("limit must be an integer")
+    if limit <= 0:
+        raise InvalidCursor("limit must be positive")
+    return min(limit, maximum)
+
+
+def wants_page(args):
+    """Pagination is opt-in so existing clients keep receiving a plain list."""
+    return "limit" in args or "cursor" in args
+
+
+def keyset_ranges(column, id_column, last_value, last_id, descending=False):
+    """WHERE clauses selecting rows strictly after (last_value, last_id).
+
+    Rows are ordered by (column, id) in the same direction. Each clause is a
+    single seek into the (column, id) index, so a page never scans past its
+    cursor; apply them in turn until the page is full. SQLite puts NULLs
+    first in ascending order and last in descending order, so a nullable
+    sort column gets its NULL rows as a range of their own.
+    """
+    if column is id_column:
+        return [id_column < last_id if descending else id_column > last_id]
+    if last_value is None:
+        # Only reachable for a nullable column: the cursor sits among the NULLs
+        if descending:
+            return [and_(column.is_(None), id_column < last_id)]
+        return [and_(column.is_(None), id_column > last_id), column.isnot(None)]
+    if descending:
+        after = [tuple_(column, id_column) < (last_value, last_id)]
+        return after + [column.is_(None)] if _nullable(column) else after
+    return [tuple_(column, id_column) > (last_value, last_id)]
+
+
+def _nullable(column):
+    return getattr(getattr(column, "expression", column), "nullable", True)
+
+
+def keyset_paginate(query, sort_name, column, id_column, args, descending=False, parse_value=None, limit=None):
+    """Apply keyset pagination to ``query`` and return (rows, next_cursor).
+
+    The cursor records the sort key and direction it was issued for, so a
+    cursor cannot be replayed against a different ordering. ``limit``
+    defaults to the catalog page size from ``args``.
+    """
+    if limit is None:
+        limit = page_size(args)
+    direction = "desc" if descending else "asc"
+
+    token = args.get("cursor")
+    if token:
+        cursor = decode_cursor(token)
+        if cursor.get("k") != sort_name or cursor.get("d") != direction or "id" not in cursor:
+            raise InvalidCursor("Cursor does not match the requested sort order")
+        last_value = cursor.get("v")
+        if last_value is not None and parse_value:
+            last_value = parse_value(last_value)
+        ranges = keyset_ranges(column, id_column, last_value, cursor["id"], descending)
+    else:
+        ranges = [None]
+
+    if descending:
+        query = query.order_by(column.desc(), id_column.desc())
+    else:
+        query = query.order_by(column.asc(), id_column.asc())
+
+    rows = []
+    for clause in ranges:
+        # The next range is only read when the page runs off the end of this one
+        ranged = query if clause is None else query.filter(clause)
+        rows += ranged.limit(limit + 1 - len(rows)).all()
+        if len(rows) > limit:
+            break
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        last = rows[-1]
+        next_cursor = encode_cursor({
+            "k": sort_name,
+            "d": direction,
+            "v": getattr(last, column.key),
+            "id": getattr(last, id_column.key),
+        })
+    return rows, next_cursor
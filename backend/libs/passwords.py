@@ -0,0 +1,81 @@
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor, TimeoutError
+
+from flask import current_app
+from werkzeug.security import check_password_hash, generate_password_hash
+
+# Password hashing is pure CPU for ~100ms. Running it on a small process pool
+# keeps it off the GIL, so one login burst cannot stall every other request
+# thread, and the bounded queue turns overload into a fast 503 instead of a
+# growing backlog of requests that will time out anyway.
+
+
+class HashingBusy(RuntimeError):
+    pass
+
+
+_pool = None
+_pool_pid = None
+_slots = None
+_methods = {}
+_lock = threading.Lock()
+
+
+def _get_pool():
+    """Pool for this process, created on first use (i.e. after a WSGI fork)."""
+    global _pool, _pool_pid, _slots
+    if _pool is None or _pool_pid != os.getpid():
+        with _lock:
+            if _pool is None or _pool_pid != os.getpid():
+                workers = current_app.config["PASSWORD_POOL_WORKERS"] or os.cpu_count() or 1
+                # spawn, not fork: the web process already runs background threads
+                _pool = ProcessPoolExecutor(workers, mp_context=multiprocessing.get_context("spawn"))
+                _slots = threading.BoundedSemaphore(workers + current_app.config["PASSWORD_POOL_MAX_PENDING"])
+                _pool_pid = os.getpid()
+    return _pool, _slots
+
+
+def _run(fn, *args):
+    if not current_app.config["PASSWORD_POOL_ENABLED"]:
+        return fn(*args)
+
+    pool, slots = _get_pool()
+    if not slots.acquire(blocking=False):
+        raise HashingBusy("Too many password operations in progress")
+    try:
+        future = pool.submit(fn, *args)
+    except BaseException:
+        slots.release()
+        raise
+    future.add_done_callback(lambda _: slots.release())
+    try:
+        return future.result(timeout=current_app.config["PASSWORD_POOL_TIMEOUT"])
+    except TimeoutError:
+        future.cancel()
+        raise HashingBusy("Password operation timed out")
+
+
+def hash_password(password):
+    return _run(generate_password_hash, password, current_app.config["PASSWORD_HASH_METHOD"])
+
+
+def verify_password(password_hash, password):
+    if not password_hash:
+        return False
+    return _run(check_password_hash, password_hash, password)
+
+
+def _configured_method():
+    """PASSWORD_HASH_METHOD with werkzeug's defaults filled in, e.g.
+    "scrypt" -> "scrypt:32768:8:1", as it appears in stored hashes."""
+    method = current_app.config["PASSWORD_HASH_METHOD"]
+    if method not in _methods:
+        _methods[method] = generate_password_hash("", method).split("$", 1)[0]
+    return _methods[method]
+
+
+def needs_rehash(password_hash):
+    """True if the stored hash uses another algorithm or cost than configured."""
+    return not password_hash or password_hash.split("$", 1)[0] != _configured_method()
@@ -0,0 +1,65 @@
+from models.models import Book
+
+
+class InvalidItems(ValueError):
+    pass
+
+
+def parse_items(items):
+    """Validate a cart/order payload into a list of (book_id, quantity)."""
+    if not items or not isinstance(items, list):
+        raise InvalidItems("Order must contain at least one item")
+
+    lines = []
+    for item in items:
+        if not isinstance(item, dict):
+            raise InvalidItems("Invalid book ID or quantity")
+        book_id = item.get("book_id")
+        quantity = item.get("quantity", 1)
+        if not isinstance(book_id, int) or not isinstance(quantity, int) or quantity <= 0:
+            raise InvalidItems("Invalid book ID or quantity")
+        lines.append((book_id, quantity))
+    return lines
+
+
+def load_books(book_ids):
+    """Fetch every referenced book with a single IN query."""
+    books = Book.query.filter(Book.id.in_(set(book_ids))).all()
+    return {book.id: book for book in books}
+
+
+def line_total(book, quantity):
+    # The one place an order line is priced; quotes and orders must agree
+    return book.price * quantity
+
+
+def quote(lines, books):
+    """Price ``lines`` against ``books`` without changing anything."""
+    quoted = []
+    total = 0
+    for book_id, quantity in lines:
+        book = books.get(book_id)
+        if not book:
+            quoted.append({"book_id": book_id, "quantity": quantity, "error": "Book not found"})
+            continue
+
+        line = {
+            "book_id": book_id,
+            "title": book.title,
+            "unit_price": book.price,
+            "quantity": quantity,
+            "stock_quantity": book.stock_quantity,
+            "available_quantity": book.available_quantity,
+            "available": book.available_quantity >= quantity,
+            "line_total": line_total(book, quantity),
+        }
+        if not line["available"]:
+            line["error"] = "Insufficient stock"
+        total += line["line_total"]
+        quoted.append(line)
+
+    return {
+        "items": quoted,
+        "total_amount": total,
+        "valid": all("error" not in line for line in quoted),
+    }
@@ -0,0 +1,55 @@
+from flask import current_app, g, has_request_context, request
+from sqlalchemy import event
+
+
+class QueryBudgetExceeded(RuntimeError):
+    pass
+
+
+def query_budget(max_queries):
+    """Declare how many SQL statements a view may issue per request.
+
+    Only enforced when QUERY_BUDGET_MODE is "warn" or "raise", so it is
+    free in production and catches N+1 regressions in debug and tests.
+    """
+    def wrapper(fn):
+        fn.query_budget = max_queries
+        return fn
+    return wrapper
+
+
+# Execution option for housekeeping statements that run at most once per
+# interval (e.g. the token blocklist sync) rather than once per request
+EXEMPT = {"query_budget_exempt": True}
+
+
+def init_query_budget(app, db):
+    mode = app.config.get("QUERY_BUDGET_MODE")
+    if not mode:
+        return
+
+    with app.app_context():
+        @event.listens_for(db.engine, "before_cursor_execute")
+        def count_statement(conn, cursor, statement, parameters, context, executemany):
+            if has_request_context() and not conn.get_execution_options().get("query_budget_exempt"):
+                g.query_count = g.get("query_count", 0) + 1
+
+    @app.before_request
+    def reset_query_count():
+        g.query_count = 0
+
+    @app.after_request
+    def check_query_budget(response):
+        count = g.get("query_count", 0)
+        response.headers["X-Query-Count"] = str(count)
+
+        view = current_app.view_functions.get(request.endpoint)
+        budget = getattr(view, "query_budget", None)
+        if budget is None or count <= budget:
+            return response
+
+        msg = f"{request.endpoint} issued {count} SQL statements (budget {budget})"
+        if mode == "raise":
+            raise QueryBudgetExceeded(msg)
+        current_app.logger.warning(msg)
+        return response
@@ -0,0 +1,112 @@
+import threading
+import time
+from datetime import datetime
+
+from flask import current_app
+from sqlalchemy import delete, select
+from sqlalchemy.dialects.sqlite import insert
+
+from models.models import db, RevokedToken
+from libs import query_budget
+
+
+class TokenBlocklist:
+    """In-process copy of the revoked_token table: jti -> expiry.
+
+    Lookups are a dict hit. New rows are pulled by id at most every
+    ``sync_interval`` seconds, so checking a token never waits on the
+    database except for that one periodic query. Expired entries are
+    dropped from memory and, every ``prune_interval``, from the table.
+    """
+
+    def __init__(self, sync_interval, prune_interval):
+        self.sync_interval = sync_interval
+        self.prune_interval = prune_interval
+        self._revoked = {}
+        self._last_id = 0
+        self._synced_at = float("-inf")
+        self._pruned_at = time.monotonic()
+        self._lock = threading.Lock()
+
+    def is_revoked(self, jti):
+        if time.monotonic() - self._synced_at > self.sync_interval:
+            self.sync()
+        return jti in self._revoked
+
+    def add(self, jti, expires_at):
+        # Under the sync lock: a prune rebuilding the set meanwhile would
+        # otherwise drop this entry until the row is pulled again
+        with self._lock:
+            self._revoked[jti] = expires_at
+
+    def sync(self):
+        # One thread syncs; the others keep answering from the current set.
+        # Every change to the set, including the prune, happens under the lock
+        if not self._lock.acquire(blocking=False):
+            return
+        try:
+            if time.monotonic() - self._synced_at <= self.sync_interval:
+                return
+            # Own connection, so the request's session is left untouched
+            with db.engine.begin() as conn:
+                conn.execution_options(**query_budget.EXEMPT)
+                rows = conn.execute(
+                    select(RevokedToken.id, RevokedToken.jti, RevokedToken.expires_at)
+                    .where(RevokedToken.id > self._last_id)
+                    .order_by(RevokedToken.id)
+                ).all()
+                for row_id, jti, expires_at in rows:
+                    self._revoked[jti] = expires_at
+                    self._last_id = row_id
+
+                if time.monotonic() - self._pruned_at > self.prune_interval:
+                    now = datetime.utcnow()
+                    self._revoked = {jti: exp for jti, exp in self._revoked.items() if exp > now}
+                    conn.execute(delete(RevokedToken).where(RevokedToken.expires_at <= now))
+                    self._pruned_at = time.monotonic()
+            self._synced_at = time.monotonic()
+        finally:
+            self._lock.release()
+
+
+_blocklist = None
+_blocklist_lock = threading.Lock()
+
+
+def get_blocklist():
+    global _blocklist
+    if _blocklist is None:
+        with _blocklist_lock:
+            if _blocklist is None:
+                _blocklist = TokenBlocklist(
+                    current_app.config["JWT_BLOCKLIST_SYNC_INTERVAL"],
+                    current_app.config["JWT_BLOCKLIST_PRUNE_INTERVAL"],
+                )
+    return _blocklist
+
+
+def revoke_token(payload):
+    """Revoke a decoded JWT until it would have expired anyway.
+
+    Returns False if it was already revoked, possibly by another worker whose
+    revocation this one has not synced yet. The unique jti makes this the
+    atomic check for single-use tokens.
+    """
+    expires_at = datetime.utcfromtimestamp(payload["exp"])
+    result = db.session.execute(
+        insert(RevokedToken).values(jti=payload["jti"], expires_at=expires_at)
+        .on_conflict_do_nothing(index_elements=["jti"])
+    )
+    inserted = result.rowcount == 1
+    if inserted:
+        db.session.commit()
+    else:
+        db.session.rollback()
+    get_blocklist().add(payload["jti"], expires_at)
+    return inserted
+
+
+def init_token_blocklist(jwt):
+    @jwt.token_in_blocklist_loader
+    def check_if_token_revoked(jwt_header, jwt_payload):
+        return get_blocklist().is_revoked(jwt_payload["jti"])
@@ -0,0 +1,93 @@
+from collections import defaultdict
+
+from flask import current_app
+from sqlalchemy import func
+from sqlalchemy.dialects.sqlite import insert
+
+from models.models import db, BookSalesDaily, SalesDaily
+from libs.archive import find_order, live_order_lines
+from libs.jobs import task
+
+
+def record_sale(order, sign=1):
+    """Add ``order`` to the daily rollups, or take it out again with ``sign=-1``.
+
+    Runs as two upserts on the session's connection, so the rollups commit
+    or roll back together with the order change.
+    """
+    day = order.order_date.date()
+    per_book = defaultdict(lambda: [0, 0.0])
+    for item in order.items:
+        per_book[item.book_id][0] += item.quantity
+        per_book[item.book_id][1] += item.price_at_purchase * item.quantity
+    if not per_book:
+        return
+
+    conn = db.session.connection()
+    book_table = BookSalesDaily.__table__
+    stmt = insert(book_table).values([
+        {"day": day, "book_id": book_id, "units": sign * units, "revenue": sign * revenue}
+        for book_id, (units, revenue) in per_book.items()
+    ])
+    conn.execute(stmt.on_conflict_do_update(
+        index_elements=["day", "book_id"],
+        set_={
+            "units": book_table.c.units + stmt.excluded.units,
+            "revenue": book_table.c.revenue + stmt.excluded.revenue,
+        },
+    ))
+
+    day_table = SalesDaily.__table__
+    stmt = insert(day_table).values(
+        day=day,
+        orders=sign,
+        units=sign * sum(units for units, _ in per_book.values()),
+        revenue=sign * sum(revenue for _, revenue in per_book.values()),
+    )
+    conn.execute(stmt.on_conflict_do_update(
+        index_elements=["day"],
+        set_={
+            "orders": day_table.c.orders + stmt.excluded.orders,
+            "units": day_table.c.units + stmt.excluded.units,
+            "revenue": day_table.c.revenue + stmt.excluded.revenue,
+        },
+    ))
+
+
+@task("record_sale")
+def record_sale_job(order_id, sign=1):
+    """Apply an order to the rollups after checkout, off the request path.
+
+    The order may have been archived since the job was queued, so the
+    archive is checked too.
+    """
+    order = find_order(order_id)
+    if order is None:
+        current_app.logger.warning(f"record_sale: order {order_id} not found; sales rollups not updated")
+        return
+    record_sale(order, sign)
+
+
+def rebuild_sales_rollups():
+    """Recompute both rollups from order history, archive included (backfill/repair)."""
+    lines = live_order_lines()
+    day = func.date(lines.c.order_date)
+    revenue = func.sum(lines.c.quantity * lines.c.price_at_purchase)
+    db.session.execute(BookSalesDaily.__table__.delete())
+    db.session.execute(SalesDaily.__table__.delete())
+    db.session.execute(
+        BookSalesDaily.__table__.insert().from_select(
+            ["day", "book_id", "units", "revenue"],
+            db.select(day, lines.c.book_id, func.sum(lines.c.quantity), revenue)
+            .group_by(day, lines.c.book_id),
+        )
+    )
+    db.session.execute(
+        SalesDaily.__table__.insert().from_select(
+            ["day", "orders", "units", "revenue"],
+            db.select(day, func.count(func.distinct(lines.c.order_id)), func.sum(lines.c.quantity), revenue)
+            .group_by(day),
+        )
+    )
+    db.session.commit()
+    return db.session.execute(db.select(func.count()).select_from(SalesDaily)).scalar()
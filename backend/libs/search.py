@@ -0,0 +1,107 @@
+import re
+
+from sqlalchemy import bindparam, event, inspect, text
+
+from models.models import db, Book, Author
+
+# FTS5 table keyed by book id (rowid). Title is weighted above author names
+# when ranking with bm25().
+SEARCH_TABLE = "book_search"
+TITLE_WEIGHT = 10.0
+AUTHOR_WEIGHT = 1.0
+
+_TOKEN_RE = re.compile(r"\w+", re.UNICODE)
+
+_REINDEX_SQL = """
+    INSERT INTO book_search (rowid, title, authors)
+    SELECT b.id, b.title,
+           COALESCE(GROUP_CONCAT(a.first_name || ' ' || a.last_name, ' '), '')
+    FROM book b
+    LEFT JOIN book_author ba ON ba.book_id = b.id
+    LEFT JOIN author a ON a.id = ba.author_id
+    {where}
+    GROUP BY b.id
+"""
+
+
+def ensure_search_index():
+    """Create the FTS table on first start and fill it from the catalog."""
+    if inspect(db.engine).has_table(SEARCH_TABLE):
+        return
+    with db.engine.begin() as conn:
+        conn.execute(text(
+            "CREATE VIRTUAL TABLE book_search USING fts5("
+            "title, authors, tokenize='unicode61 remove_diacritics 2')"
+        ))
+        conn.execute(text(_REINDEX_SQL.format(where="")))
+
+
+def rebuild_search_index(conn):
+    conn.execute(text("DELETE FROM book_search"))
+    conn.execute(text(_REINDEX_SQL.format(where="")))
+
+
+def reindex_books(conn, book_ids):
+    """Refresh the index rows for ``book_ids``; deleted books just drop out."""
+    if not book_ids:
+        return
+    ids = bindparam("ids", expanding=True)
+    conn.execute(text("DELETE FROM book_search WHERE rowid IN :ids").bindparams(ids), {"ids": book_ids})
+    conn.execute(
+        text(_REINDEX_SQL.format(where="WHERE b.id IN :ids")).bindparams(ids),
+        {"ids": book_ids},
+    )
+
+
+def reindex_book_range(conn, first_id, last_id):
+    """reindex_books for the id range ``first_id``..``last_id``.
+
+    Bulk loads assign contiguous ids; a range keeps the statements identical
+    from batch to batch, where an IN list is compiled afresh for every size.
+    """
+    bounds = {"first_id": first_id, "last_id": last_id}
+    conn.execute(text("DELETE FROM book_search WHERE rowid BETWEEN :first_id AND :last_id"), bounds)
+    conn.execute(text(_REINDEX_SQL.format(where="WHERE b.id BETWEEN :first_id AND :last_id")), bounds)
+
+
+def build_match_query(q):
+    """Turn free text into an FTS5 query: every word must match as a prefix."""
+    tokens = _TOKEN_RE.findall(q or "")
+    return " ".join(f'"{token}"*' for token in tokens)
+
+
+def search_book_ids(q, limit):
+    match = build_match_query(q)
+    if not match:
+        return []
+    rows = db.session.execute(
+        text(
+            "SELECT rowid FROM book_search WHERE book_search MATCH :match "
+            "ORDER BY bm25(book_search, :title_weight, :author_weight) LIMIT :limit"
+        ),
+        {"match": match, "title_weight": TITLE_WEIGHT, "author_weight": AUTHOR_WEIGHT, "limit": limit},
+    )
+    return [row[0] for row in rows]
+
+
+# --- Automatic sync ---
+# Book and Author writes are collected before flush (while relationships are
+# still loadable) and re-indexed after flush, inside the same transaction.
+
+@event.listens_for(db.session, "before_flush")
+def _collect_search_changes(session, flush_context, instances):
+    pending = session.info.setdefault("search_pending", set())
+    for obj in list(session.new) + list(session.dirty) + list(session.deleted):
+        if isinstance(obj, Book):
+            pending.add(obj)
+        elif isinstance(obj, Author) and (obj in session.deleted or session.is_modified(obj)):
+            pending.update(obj.books)
+
+
+@event.listens_for(db.session, "after_flush")
+def _apply_search_changes(session, flush_context):
+    pending = session.info.pop("search_pending", None)
+    if not pending:
+        return
+    book_ids = [book.id for book in pending if book.id is not None]
+    reindex_books(session.connection(), book_ids)
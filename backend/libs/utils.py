@@ -1,8 +1,81 @@
-
+import threading
+import time
+from collections import OrderedDict
 from functools import wraps 
-from flask import jsonify
+from flask import current_app, jsonify
 from flask_jwt_extended import get_jwt_identity, verify_jwt_in_request
-from models.models import User, db
+from models.models import Role, User, db
+
+
+class RoleCache:
+    """Thread-safe LRU of user id -> role name whose entries expire after ``ttl``.
+
+    Each worker process has its own copy, so a role change made through
+    another process shows up here within ``ttl`` seconds.
+    """
+
+    def __init__(self, max_entries, ttl):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, user_id):
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry is None:
+                return None
+            role, stored_at = entry
+            if time.monotonic() - stored_at > self.ttl:
+                del self._entries[user_id]
+                return None
+            self._entries.move_to_end(user_id)
+            return role
+
+    def set(self, user_id, role):
+        with self._lock:
+            self._entries[user_id] = (role, time.monotonic())
+            self._entries.move_to_end(user_id)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, user_id):
+        with self._lock:
+            self._entries.pop(user_id, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+_role_cache = None
+_role_cache_lock = threading.Lock()
+
+
+def get_role_cache():
+    global _role_cache
+    if _role_cache is None:
+        with _role_cache_lock:
+            if _role_cache is None:
+                _role_cache = RoleCache(
+                    current_app.config["ROLE_CACHE_MAX_ENTRIES"],
+                    current_app.config["ROLE_CACHE_TTL"],
+                )
+    return _role_cache
+
+
+def current_role(user_id):
+    """The user's current role name (None if the user is gone), cached."""
+    cache = get_role_cache()
+    role = cache.get(user_id)
+    if role is None:
+        role = db.session.execute(
+            db.select(Role.name).join(User, User.role_id == Role.id).where(User.id == user_id)
+        ).scalar()
+        if role is not None:
+            cache.set(user_id, role)
+    return role
+
 
 def requires_roles(*roles):
     def wrapper(fn):
@@ -20,19 +93,21 @@ def requires_roles(*roles):
 
             # --- 2. Authorization Check (Role Validation) ---
             
-            # Get the authenticated user's ID from the token payload
+            # The token's "role" claim is only what the role was at login, so
+            # check the current role instead; it comes from the in-process
+            # cache, so a warm request costs no queries
             user_id = get_jwt_identity() 
-            user = db.session.get(User, user_id)
+            role = current_role(user_id)
             
-            if not user:
+            if role is None:
                 return jsonify(msg='User not found or database error'), 404
             
             # Check if the user's role name is in the allowed list of roles
-            if user.role.name not in roles:
+            if role not in roles:
             
-                return jsonify(msg=f"Access forbidden: User role '{user.role.name}' is not authorized"), 403
+                return jsonify(msg=f"Access forbidden: User role '{role}' is not authorized"), 403
             
         
             return fn(*args, **kwargs)
         return decorated_view
-    return wrapper
\ No newline at end of file
+    return wrapper
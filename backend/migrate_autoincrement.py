@@ -0,0 +1,89 @@
+"""
+Migration script to stop SQLite from reusing primary keys
+Rebuilds tables created without AUTOINCREMENT, whose ids could be handed out
+again after the highest rows were deleted (archived orders, deleted books and
+authors), and seeds their sequence above every id already used elsewhere
+"""
+
+import re
+
+from sqlalchemy import func, select
+from sqlalchemy.schema import CreateTable
+
+from app import create_app
+from models.models import (
+    db, ArchivedOrder, ArchivedOrderItem, Author, Book, CatalogTombstone, Order, OrderItem,
+)
+
+
+def _tombstoned(entity):
+    return select(func.max(CatalogTombstone.entity_id)).where(CatalogTombstone.entity == entity)
+
+
+# Table -> queries for ids the new table must never reuse
+TABLES = [
+    (Order, [select(func.max(ArchivedOrder.id))]),
+    (OrderItem, [select(func.max(ArchivedOrderItem.id))]),
+    (Book, [_tombstoned("book")]),
+    (Author, [_tombstoned("author")]),
+]
+
+
+def _rebuild(conn, table):
+    name = table.name
+    columns = [row[1] for row in conn.exec_driver_sql(f'PRAGMA table_info("{name}")')]
+    indexes = [row[0] for row in conn.exec_driver_sql(
+        "SELECT name FROM sqlite_master WHERE type = 'index' AND tbl_name = ? AND sql IS NOT NULL", (name,)
+    )]
+    for index in indexes:
+        conn.exec_driver_sql(f'DROP INDEX "{index}"')
+
+    # Build the new table under a temporary name, then swap it in; renaming
+    # the old table instead would rewrite the foreign keys pointing at it
+    ddl = str(CreateTable(table).compile(conn))
+    ddl = re.sub(rf'CREATE TABLE "?{name}"?', f'CREATE TABLE "{name}_new"', ddl, count=1)
+    conn.exec_driver_sql(ddl)
+    copied = ", ".join(f'"{column}"' for column in columns if column in table.c)
+    conn.exec_driver_sql(f'INSERT INTO "{name}_new" ({copied}) SELECT {copied} FROM "{name}"')
+    conn.exec_driver_sql(f'DROP TABLE "{name}"')
+    conn.exec_driver_sql(f'ALTER TABLE "{name}_new" RENAME TO "{name}"')
+    for index in table.indexes:
+        index.create(conn)
+
+
+def _seed_sequence(conn, table, others):
+    used = [conn.execute(select(func.coalesce(func.max(table.c.id), 0))).scalar()]
+    used += [seq for (seq,) in conn.exec_driver_sql(
+        "SELECT seq FROM sqlite_sequence WHERE name = ?", (table.name,)
+    )]
+    for query in others:
+        used.append(conn.execute(query).scalar() or 0)
+    conn.exec_driver_sql("DELETE FROM sqlite_sequence WHERE name = ?", (table.name,))
+    conn.exec_driver_sql("INSERT INTO sqlite_sequence (name, seq) VALUES (?, ?)", (table.name, max(used)))
+    return max(used)
+
+
+def add_autoincrement():
+    app = create_app()
+    with app.app_context():
+        try:
+            with db.engine.begin() as conn:
+                for model, others in TABLES:
+                    table = model.__table__
+                    sql = conn.exec_driver_sql(
+                        "SELECT sql FROM sqlite_master WHERE type = 'table' AND name = ?", (table.name,)
+                    ).scalar()
+                    if "AUTOINCREMENT" in sql.upper():
+                        print(f"ℹ️ {table.name} already uses AUTOINCREMENT")
+                    else:
+                        print(f"Rebuilding {table.name} with AUTOINCREMENT...")
+                        _rebuild(conn, table)
+                    seq = _seed_sequence(conn, table, others)
+                    print(f"✅ {table.name} ids continue after {seq}")
+
+        except Exception as e:
+            print(f"❌ Error: {e}")
+
+
+if __name__ == '__main__':
+    add_autoincrement()
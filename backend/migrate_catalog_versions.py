@@ -0,0 +1,37 @@
+"""
+Migration script to add catalog_version columns to Book and Author
+Run this script after updating the models.py file
+"""
+
+from app import create_app
+from models.models import db
+
+
+def add_catalog_version_columns():
+    app = create_app()
+    with app.app_context():
+        try:
+            with db.engine.connect() as conn:
+                for table in ("book", "author"):
+                    result = conn.execute(db.text(f"PRAGMA table_info({table})"))
+                    columns = [row[1] for row in result]
+
+                    if 'catalog_version' not in columns:
+                        print(f"Adding catalog_version column to {table}...")
+                        conn.execute(db.text(f"ALTER TABLE {table} ADD COLUMN catalog_version INTEGER DEFAULT 0 NOT NULL"))
+                        conn.execute(db.text(f"CREATE INDEX IF NOT EXISTS ix_{table}_catalog_version ON {table} (catalog_version)"))
+                        conn.commit()
+                        print(f"✅ Successfully added catalog_version to {table}!")
+                    else:
+                        print(f"ℹ️ Column catalog_version already exists on {table}")
+
+            # Tombstone table is new, create_all() picks it up
+            db.create_all()
+            print("✅ Catalog tombstone table ready")
+
+        except Exception as e:
+            print(f"❌ Error: {e}")
+
+
+if __name__ == '__main__':
+    add_catalog_version_columns()
@@ -0,0 +1,17 @@
+"""
+Migration script to create and backfill the book_entitlement table
+Run this script once after updating the models.py file
+"""
+from app import create_app
+from libs.entitlements import rebuild_entitlements
+
+
+def migrate():
+    app = create_app()
+    with app.app_context():
+        count = rebuild_entitlements()
+        print(f"✅ Rebuilt {count} book entitlements from order history")
+
+
+if __name__ == "__main__":
+    migrate()
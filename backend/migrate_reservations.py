@@ -0,0 +1,34 @@
+"""
+Migration script to add stock reservations
+Adds Book.reserved_quantity and creates the reservation table
+"""
+
+from app import create_app
+from models.models import db
+
+
+def add_reservations():
+    app = create_app()
+    with app.app_context():
+        try:
+            with db.engine.connect() as conn:
+                result = conn.execute(db.text("PRAGMA table_info(book)"))
+                columns = [row[1] for row in result]
+
+                if 'reserved_quantity' not in columns:
+                    print("Adding reserved_quantity column...")
+                    conn.execute(db.text("ALTER TABLE book ADD COLUMN reserved_quantity INTEGER DEFAULT 0 NOT NULL"))
+                    conn.commit()
+                    print("✅ Successfully added reserved_quantity column!")
+                else:
+                    print("ℹ️ Column reserved_quantity already exists")
+
+            db.create_all()
+            print("✅ Reservation table ready")
+
+        except Exception as e:
+            print(f"❌ Error: {e}")
+
+
+if __name__ == '__main__':
+    add_reservations()
@@ -0,0 +1,17 @@
+"""
+Migration script to create and backfill the sales rollup tables
+Run this script once after updating the models.py file, or again to repair the rollups
+"""
+from app import create_app
+from libs.sales import rebuild_sales_rollups
+
+
+def migrate():
+    app = create_app()
+    with app.app_context():
+        days = rebuild_sales_rollups()
+        print(f"✅ Rebuilt sales rollups for {days} days of order history")
+
+
+if __name__ == "__main__":
+    migrate()
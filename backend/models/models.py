@@ -1,6 +1,7 @@
 from flask_sqlalchemy import SQLAlchemy
-from werkzeug.security import generate_password_hash, check_password_hash
 from datetime import datetime
+from libs.assets import thumbnail_urls
+from libs.passwords import hash_password, verify_password
 
 db = SQLAlchemy()
 
@@ -14,20 +15,28 @@ class Role(db.Model):
 
 
 class User(db.Model):
+    __table_args__ = (
+        # Login/register lookups and keyset pagination by username
+        db.Index("ix_user_username", "username", unique=True),
+        # Case-insensitive prefix search (LIKE) in the admin user listing
+        db.Index("ix_user_username_nocase", db.text("username COLLATE NOCASE")),
+        db.Index("ix_user_email_nocase", db.text("email COLLATE NOCASE")),
+    )
+
     id = db.Column(db.Integer, primary_key=True)
     username = db.Column(db.String(100), nullable=False)
     email = db.Column(db.String(100), unique=True, nullable=False)
-    password_hash = db.Column(db.String(128))
+    password_hash = db.Column(db.String(256))
     role_id = db.Column(db.Integer, db.ForeignKey("role.id"), nullable=False)
 
     orders = db.relationship("Order", backref="customer", lazy=True)
     addresses = db.relationship("Address", backref="user", lazy=True, cascade="all, delete-orphan")
 
     def set_password(self, password):
-        self.password_hash = generate_password_hash(password)
+        self.password_hash = hash_password(password)
 
     def check_password(self, password):
-        return check_password_hash(self.password_hash, password)
+        return verify_password(self.password_hash, password)
 
     def to_dict(self):
         return {
@@ -78,14 +87,27 @@ book_author_association = db.Table(
     "book_author",
     db.Column("book_id", db.Integer, db.ForeignKey("book.id"), primary_key=True),
     db.Column("author_id", db.Integer, db.ForeignKey("author.id"), primary_key=True),
+    # The primary key covers book -> authors; this covers author -> books
+    db.Index("ix_book_author_author_book", "author_id", "book_id"),
 )
 
 
 class Author(db.Model):
+    # NOCASE indexes let SQLite serve the case-insensitive name-prefix LIKE
+    __table_args__ = (
+        db.Index("ix_author_first_name_nocase", db.text("first_name COLLATE NOCASE")),
+        db.Index("ix_author_last_name_nocase", db.text("last_name COLLATE NOCASE")),
+        db.Index("ix_author_last_name_id", "last_name", "id"),
+        # Deleted ids stay deleted: delta sync reports them as tombstones
+        {"sqlite_autoincrement": True},
+    )
+
     id = db.Column(db.Integer, primary_key=True)
     first_name = db.Column(db.String(50), nullable=False)
     last_name = db.Column(db.String(50), nullable=False)
     image_url = db.Column(db.String(255))
+    # Catalog version of the last write touching this author (delta sync)
+    catalog_version = db.Column(db.Integer, default=0, nullable=False, index=True)
     
     books = db.relationship(
         "Book",
@@ -104,12 +126,29 @@ class Author(db.Model):
 
 
 class Book(db.Model):
+    # Composite (sort column, id) indexes back keyset pagination on the catalog;
+    # the is_recommended / stock_quantity ones serve the filtered listings.
+    __table_args__ = (
+        db.Index("ix_book_title_id", "title", "id"),
+        db.Index("ix_book_price_id", "price", "id"),
+        db.Index("ix_book_publication_date_id", "publication_date", "id"),
+        db.Index("ix_book_recommended_id", "is_recommended", "id"),
+        db.Index("ix_book_recommended_price_id", "is_recommended", "price", "id"),
+        db.Index("ix_book_recommended_publication_date_id", "is_recommended", "publication_date", "id"),
+        db.Index("ix_book_stock_price", "stock_quantity", "price"),
+        # Never hand a deleted book's id to a new one: delta sync would list it
+        # as both changed and deleted, and entitlements/rollups would carry over
+        {"sqlite_autoincrement": True},
+    )
+
     id = db.Column(db.Integer, primary_key=True)
     title = db.Column(db.String(255), nullable=False)
     price = db.Column(db.Float, nullable=False)
     
     # Inventory management
     stock_quantity = db.Column(db.Integer, default=0, nullable=False)
+    # Copies held by active checkout reservations
+    reserved_quantity = db.Column(db.Integer, default=0, nullable=False)
     publication_date = db.Column(db.Date, nullable=True)
     
     # Recommendation flag
@@ -118,17 +157,25 @@ class Book(db.Model):
     file_url = db.Column(db.String(512), nullable=True)
     img_url = db.Column(db.String(512), nullable=True)
 
+    # Catalog version of the last write touching this book (delta sync)
+    catalog_version = db.Column(db.Integer, default=0, nullable=False, index=True)
+
     authors = db.relationship(
         "Author", secondary=book_author_association, back_populates="books"
     )
     order_items = db.relationship("OrderItem", backref="book", lazy=True)
 
+    @property
+    def available_quantity(self):
+        return self.stock_quantity - (self.reserved_quantity or 0)
+
     def to_dict(self, include_file_url=False, include_img_url=False):
         data = {
             "id": self.id,
             "title": self.title,
             "price": self.price,
             "stock_quantity": self.stock_quantity,
+            "available_quantity": self.available_quantity,
             "publication_date": self.publication_date.isoformat() if self.publication_date else None,
             "is_recommended": self.is_recommended,
             "authors": [a.to_dict() for a in self.authors],
@@ -138,37 +185,215 @@ class Book(db.Model):
     
         if include_img_url:
             data["img_url"] = self.img_url
+            data["img_thumbnails"] = thumbnail_urls(self.img_url)
         return data
         
 
+class BookEntitlement(db.Model):
+    """Owned-books index: how many live (not Cancelled) orders of a user
+    contain a book. Maintained by the order routes so ownership checks are a
+    primary-key lookup.
+    """
+    user_id = db.Column(db.Integer, db.ForeignKey("user.id"), primary_key=True)
+    book_id = db.Column(db.Integer, db.ForeignKey("book.id"), primary_key=True)
+    order_count = db.Column(db.Integer, nullable=False, default=0)
+
+
+class Job(db.Model):
+    """Durable background job, run by libs.jobs workers after the enqueuing
+    transaction commits. Finished jobs are deleted; ``failed`` ones are kept.
+    """
+    __table_args__ = (
+        db.Index("ix_job_status_run_at", "status", "run_at"),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    name = db.Column(db.String(100), nullable=False)
+    payload = db.Column(db.JSON, nullable=False)
+    status = db.Column(db.String(20), nullable=False, default="pending")  # pending, running, failed
+    attempts = db.Column(db.Integer, nullable=False, default=0)
+    run_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    locked_at = db.Column(db.DateTime)
+    last_error = db.Column(db.Text)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+
+class BookSalesDaily(db.Model):
+    """Units and revenue per book per (UTC) day over non-Cancelled orders.
+    Maintained by the order routes; rebuild with libs.sales.rebuild_sales_rollups().
+    """
+    day = db.Column(db.Date, primary_key=True)
+    book_id = db.Column(db.Integer, db.ForeignKey("book.id"), primary_key=True)
+    units = db.Column(db.Integer, nullable=False, default=0)
+    revenue = db.Column(db.Float, nullable=False, default=0)
+
+
+class SalesDaily(db.Model):
+    """Store-wide order count, units and revenue per (UTC) day."""
+    day = db.Column(db.Date, primary_key=True)
+    orders = db.Column(db.Integer, nullable=False, default=0)
+    units = db.Column(db.Integer, nullable=False, default=0)
+    revenue = db.Column(db.Float, nullable=False, default=0)
+
+
+class RevokedToken(db.Model):
+    """JWT ids revoked before they expire (logout, refresh-token rotation).
+    Workers load new rows by increasing id into an in-memory set, so ids
+    must never be reused after old rows are pruned.
+    """
+    __table_args__ = {"sqlite_autoincrement": True}
+
+    id = db.Column(db.Integer, primary_key=True)
+    jti = db.Column(db.String(36), nullable=False, unique=True)
+    expires_at = db.Column(db.DateTime, nullable=False, index=True)
+    revoked_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+
+class IdempotencyRecord(db.Model):
+    """First response to an Idempotency-Key, replayed to retries of the
+    same request. ``status_code`` stays NULL while the request is running.
+    """
+    user_id = db.Column(db.Integer, db.ForeignKey("user.id"), primary_key=True)
+    key = db.Column(db.String(255), primary_key=True)
+    request_hash = db.Column(db.String(64), nullable=False)
+    status_code = db.Column(db.Integer)
+    response = db.Column(db.JSON)
+    created_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow, index=True)
+
+
+class Reservation(db.Model):
+    """Checkout hold on stock, released when it expires unless ordered."""
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey("user.id"), nullable=False, index=True)
+    items = db.Column(db.JSON, nullable=False)  # {book_id: quantity}
+    expires_at = db.Column(db.DateTime, nullable=False, index=True)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+    def quantities(self):
+        return {int(book_id): quantity for book_id, quantity in self.items.items()}
+
+    def to_dict(self):
+        return {
+            "id": self.id,
+            "expires_at": self.expires_at.isoformat(),
+            "items": [
+                {"book_id": book_id, "quantity": quantity}
+                for book_id, quantity in self.quantities().items()
+            ],
+        }
+
+
+class CatalogState(db.Model):
+    """Version counters: row 1 is bumped by every book/author write, row 2
+    by every stock or reservation change (see libs.cache).
+
+    Lives in the database so all worker processes see the same value.
+    """
+    id = db.Column(db.Integer, primary_key=True)
+    version = db.Column(db.Integer, nullable=False, default=0)
+
+
+class CatalogTombstone(db.Model):
+    """Record of a deleted book or author, so delta sync can report it."""
+    id = db.Column(db.Integer, primary_key=True)
+    entity = db.Column(db.String(20), nullable=False)  # "book" or "author"
+    entity_id = db.Column(db.Integer, nullable=False)
+    catalog_version = db.Column(db.Integer, nullable=False, index=True)
+    deleted_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+
 class Order(db.Model):
+    __table_args__ = (
+        # Keyset pagination of the admin listing, newest first
+        db.Index("ix_order_order_date_id", "order_date", "id"),
+        db.Index("ix_order_status_order_date_id", "status", "order_date", "id"),
+        # Per-user order history, newest first
+        db.Index("ix_order_user_order_date_id", "user_id", "order_date", "id"),
+        # Archived orders keep their ids, so ids must never be handed out again
+        # once the newest orders have been archived (see migrate_autoincrement.py)
+        {"sqlite_autoincrement": True},
+    )
+
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey("user.id"), nullable=False)
-    order_date = db.Column(db.DateTime, default=datetime.utcnow)
+    order_date = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
     total_amount = db.Column(db.Float, nullable=False)
 
     status = db.Column(db.String(50), default="Pending")
 
     items = db.relationship("OrderItem", backref="order", lazy=True)
 
-    def to_dict(self):
-        return {
+    def to_dict(self, include_items=True):
+        order_data = {
             "id": self.id,
             "user_id": self.user_id,
             "order_date": self.order_date.isoformat(),
             "total_amount": self.total_amount,
             "status": self.status,
-            "items": [item.to_dict() for item in self.items],
         }
+        if include_items:
+            order_data["items"] = [item.to_dict() for item in self.items]
+        return order_data
 
 
 class OrderItem(db.Model):
+    __table_args__ = {"sqlite_autoincrement": True}
+
     id = db.Column(db.Integer, primary_key=True)
-    order_id = db.Column(db.Integer, db.ForeignKey("order.id"), nullable=False)
+    order_id = db.Column(db.Integer, db.ForeignKey("order.id"), nullable=False, index=True)
+    book_id = db.Column(db.Integer, db.ForeignKey("book.id"), nullable=False)
+    quantity = db.Column(db.Integer, nullable=False, default=1)
+    price_at_purchase = db.Column(db.Float, nullable=False)
+
+    def to_dict(self):
+        return {
+            "id": self.id,
+            "order_id": self.order_id,
+            "book": self.book.title,
+            "price_at_purchase": self.price_at_purchase,
+        }
+
+
+# Cold storage for finished orders, moved out of order/order_item by
+# libs.archive. Rows keep their ids, so lookups by id can fall through.
+
+class ArchivedOrder(db.Model):
+    __table_args__ = (
+        db.Index("ix_archived_order_user_order_date_id", "user_id", "order_date", "id"),
+    )
+
+    id = db.Column(db.Integer, primary_key=True, autoincrement=False)
+    user_id = db.Column(db.Integer, db.ForeignKey("user.id"), nullable=False)
+    order_date = db.Column(db.DateTime, nullable=False)
+    total_amount = db.Column(db.Float, nullable=False)
+    status = db.Column(db.String(50))
+    archived_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+    items = db.relationship("ArchivedOrderItem", backref="order", lazy=True)
+
+    def to_dict(self, include_items=True):
+        order_data = {
+            "id": self.id,
+            "user_id": self.user_id,
+            "order_date": self.order_date.isoformat(),
+            "total_amount": self.total_amount,
+            "status": self.status,
+            "archived": True,
+        }
+        if include_items:
+            order_data["items"] = [item.to_dict() for item in self.items]
+        return order_data
+
+
+class ArchivedOrderItem(db.Model):
+    id = db.Column(db.Integer, primary_key=True, autoincrement=False)
+    order_id = db.Column(db.Integer, db.ForeignKey("archived_order.id"), nullable=False, index=True)
     book_id = db.Column(db.Integer, db.ForeignKey("book.id"), nullable=False)
     quantity = db.Column(db.Integer, nullable=False, default=1)
     price_at_purchase = db.Column(db.Float, nullable=False)
 
+    book = db.relationship("Book")
+
     def to_dict(self):
         return {
             "id": self.id,
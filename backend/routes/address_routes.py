@@ -1,9 +1,27 @@
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, current_app, request, jsonify
 from flask_jwt_extended import jwt_required, get_jwt_identity
 from models.models import db, Address, User
+from libs.gazetteer import InvalidAddress, get_gazetteer
 
 address_bp = Blueprint("address", __name__)
 
+GEO_FIELDS = ("sub_district", "district", "province", "postal_code")
+
+
+def _check_location(address):
+    """Error message if the sub-district/district/province/postal code don't agree, else None."""
+    gazetteer = get_gazetteer()
+    if gazetteer is None:
+        return None
+    try:
+        gazetteer.validate(
+            *(address[field] for field in GEO_FIELDS),
+            strict=current_app.config["GEO_STRICT_ADDRESSES"],
+        )
+    except InvalidAddress as e:
+        return str(e)
+    return None
+
 
 @address_bp.route("/addresses", methods=["GET"])
 @jwt_required()
@@ -37,6 +55,10 @@ def create_address():
         for field in required_fields:
             if field not in data or not data[field]:
                 return jsonify({"error": f"Missing required field: {field}"}), 400
+
+        error = _check_location(data)
+        if error:
+            return jsonify({"error": error}), 400
         
         # If this is the first address or is_default is True, set it as default
         is_default = data.get("is_default", False)
@@ -99,6 +121,12 @@ def update_address(address_id):
             return jsonify({"error": "Address not found"}), 404
         
         data = request.get_json()
+
+        if any(field in data for field in GEO_FIELDS):
+            location = {field: data.get(field, getattr(address, field)) for field in GEO_FIELDS}
+            error = _check_location(location)
+            if error:
+                return jsonify({"error": error}), 400
         
         # Update fields
         if "label" in data:
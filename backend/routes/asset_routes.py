@@ -0,0 +1,95 @@
+import os
+import time
+from flask import Blueprint, abort, current_app, request, jsonify, send_file
+from flask_jwt_extended import jwt_required
+from libs.utils import requires_roles
+from libs.assets import (
+    THUMBNAIL_SIZES, InvalidAsset, asset_path, asset_url, ensure_thumbnail, store_asset, thumbnail_urls,
+    verify_file_signature,
+)
+
+asset_bp = Blueprint("asset_bp", __name__)
+
+ONE_YEAR = 365 * 24 * 3600
+
+
+def _send_immutable(path, etag):
+    # conditional=True gives Range and If-None-Match handling; a plain path
+    # lets the WSGI server's file_wrapper use sendfile()
+    response = send_file(path, conditional=True, etag=etag, max_age=ONE_YEAR)
+    response.cache_control.public = True
+    response.cache_control.immutable = True
+    return response
+
+
+@asset_bp.route("/<kind>", methods=["POST"])
+@jwt_required()
+@requires_roles("admin", "superadmin")
+def upload_asset(kind):
+    if kind not in ("images", "files"):
+        return jsonify({"msg": "Unknown asset type. Use images or files"}), 404
+
+    upload = request.files.get("file")
+    if not upload:
+        return jsonify({"msg": "Missing file"}), 400
+
+    try:
+        name = store_asset(kind, upload.stream, upload.filename)
+    except InvalidAsset as e:
+        return jsonify({"msg": str(e)}), 400
+    except OSError as e:
+        return jsonify({"msg": "Error storing file", "error": str(e)}), 500
+
+    url = asset_url(kind, name)
+    data = {"name": name, "url": url}
+    if kind == "images":
+        for size in THUMBNAIL_SIZES:
+            try:
+                ensure_thumbnail(name, size)
+            except Exception:
+                os.unlink(asset_path(kind, name))
+                return jsonify({"msg": "Uploaded file is not a valid image"}), 400
+        data["thumbnails"] = thumbnail_urls(url)
+    return jsonify(data), 201
+
+
+@asset_bp.route("/images/<name>", methods=["GET"])
+def get_image(name):
+    try:
+        path = asset_path("images", name)
+    except InvalidAsset:
+        abort(404)
+    if not os.path.exists(path):
+        abort(404)
+    return _send_immutable(path, name[:64])
+
+
+@asset_bp.route("/images/<name>/<int:size>.jpg", methods=["GET"])
+def get_thumbnail(name, size):
+    try:
+        path = ensure_thumbnail(name, size)
+    except InvalidAsset:
+        abort(404)
+    if not path:
+        abort(404)
+    return _send_immutable(path, f"{name[:64]}-{size}")
+
+
+@asset_bp.route("/files/<name>", methods=["GET"])
+def get_file(name):
+    # Book files need a link from /api/books/<id>/download-link; the
+    # signature is checked without touching the database
+    if not verify_file_signature(name, request.args.get("exp"), request.args.get("sig")):
+        return jsonify({"msg": "Download link is invalid or has expired"}), 403
+
+    try:
+        path = asset_path("files", name)
+    except InvalidAsset:
+        abort(404)
+    if not os.path.exists(path):
+        abort(404)
+
+    response = send_file(path, conditional=True, etag=name[:64], max_age=int(request.args["exp"]) - int(time.time()))
+    response.cache_control.public = False
+    response.cache_control.private = True
+    return response
@@ -1,10 +1,24 @@
 from flask import Blueprint, request, jsonify
-from flask_jwt_extended import  create_access_token, jwt_required, get_jwt_identity
+from flask_jwt_extended import (
+    create_access_token, create_refresh_token, decode_token, get_jwt, get_jwt_identity, jwt_required,
+)
+from flask_jwt_extended.exceptions import JWTExtendedException
+from jwt.exceptions import PyJWTError
 from models.models import db, User, Role
+from libs.passwords import HashingBusy, needs_rehash
+from libs.revocation import get_blocklist, revoke_token
+from libs.utils import current_role
 
 
 auth_bp = Blueprint('auth_bp', __name__)
 
+
+def _busy():
+    response = jsonify({"msg": "Server is busy, please try again"})
+    response.headers['Retry-After'] = '1'
+    return response, 503
+
+
 @auth_bp.route('/register', methods=['POST'])
 def register():
     data = request.get_json()
@@ -24,7 +38,10 @@ def register():
     
     
     new_user = User(username=username, email=email, role_id=customer_role.id)
-    new_user.set_password(password)
+    try:
+        new_user.set_password(password)
+    except HashingBusy:
+        return _busy()
     
     
     try:
@@ -48,12 +65,28 @@ def login():
     
     user = User.query.filter_by(username=username).first()
     
-    if user and user.check_password(password):
+    try:
+        authenticated = bool(user) and user.check_password(password)
+    except HashingBusy:
+        return _busy()
+
+    if authenticated and needs_rehash(user.password_hash):
+        # Upgrade hashes made with an older algorithm or cost while the plain
+        # password is at hand; if the pool is busy, the next login retries
+        try:
+            user.set_password(password)
+            db.session.commit()
+        except HashingBusy:
+            db.session.rollback()
+
+    if authenticated:
         
-        access_token = create_access_token(identity=user.id)
+        # Clients can read the role from the token; the server re-checks it
+        access_token = create_access_token(identity=user.id, additional_claims={"role": user.role.name})
         print(f"Generated Access Token: {access_token}")
         response_data = {
             "access_token": access_token,
+            "refresh_token": create_refresh_token(identity=user.id),
             "user": user.to_dict()
         }
         
@@ -63,6 +96,45 @@ def login():
 
 
 
+@auth_bp.route('/refresh', methods=['POST'])
+@jwt_required(refresh=True)
+def refresh():
+    user_id = get_jwt_identity()
+    role = current_role(user_id)
+    if role is None:
+        return jsonify(msg='User not found'), 404
+
+    # Rotate: the presented refresh token is single-use. Only the request
+    # that records its revocation gets new tokens, so a replay that races
+    # the blocklist sync on another worker still fails here.
+    if not revoke_token(get_jwt()):
+        return jsonify({"msg": "Token has been revoked"}), 401
+    return jsonify({
+        "access_token": create_access_token(identity=user_id, additional_claims={"role": role}),
+        "refresh_token": create_refresh_token(identity=user_id),
+    }), 200
+
+
+@auth_bp.route('/logout', methods=['POST'])
+@jwt_required(verify_type=False)
+def logout():
+    revoke_token(get_jwt())
+
+    # Revoke the matching refresh token too when the client sends it
+    data = request.get_json(silent=True) or {}
+    if data.get('refresh_token'):
+        try:
+            payload = decode_token(data['refresh_token'])
+        except (PyJWTError, JWTExtendedException):
+            return jsonify({"msg": "Invalid refresh token"}), 400
+        if str(payload.get('sub')) != str(get_jwt_identity()):
+            return jsonify({"msg": "Refresh token belongs to another user"}), 400
+        if not get_blocklist().is_revoked(payload['jti']):
+            revoke_token(payload)
+
+    return jsonify({"msg": "Logged out"}), 200
+
+
 @auth_bp.route('/profile', methods=['GET'])
 @jwt_required()
 def profile():
@@ -1,10 +1,20 @@
 from flask import Blueprint, request, jsonify
 from flask_jwt_extended import jwt_required
-from models.models import db, Author
+from sqlalchemy.orm import selectinload
+from sqlalchemy import func, or_
+from models.models import db, Author, Book, book_author_association
 from libs.utils import requires_roles
+from libs.query_budget import query_budget
+from libs.cache import cached_response
+from libs.pagination import keyset_paginate, wants_page
 
 author_bp = Blueprint("author_bp", __name__)
 
+AUTHOR_SORT_COLUMNS = {
+    "id": Author.id,
+    "name": Author.last_name,
+}
+
 
 @author_bp.route("/", methods=["POST"])
 @jwt_required()
@@ -55,20 +65,66 @@ def delete_author(author_id):
         return jsonify({"msg": "Error deleting author", "error": str(e)}), 500
     
 
+def _book_counts(author_ids):
+    """Book count per author from one GROUP BY over book_author."""
+    if not author_ids:
+        return {}
+    rows = db.session.execute(
+        db.select(book_author_association.c.author_id, func.count())
+        .where(book_author_association.c.author_id.in_(author_ids))
+        .group_by(book_author_association.c.author_id)
+    )
+    return dict(rows.all())
+
+
 @author_bp.route("/", methods=["GET"])
+@query_budget(3)
+@cached_response
 def list_authors():
-    authors = Author.query.all()
+    query = Author.query
+
+    # ?q= matches the start of the first or last name, case-insensitively
+    prefix = request.args.get("q", "").strip().replace("%", "").replace("_", "")
+    if prefix:
+        query = query.filter(or_(
+            Author.first_name.like(f"{prefix}%"),
+            Author.last_name.like(f"{prefix}%"),
+        ))
+
+    next_cursor = None
+    if wants_page(request.args):
+        sort = request.args.get("sort", "id")
+        if sort not in AUTHOR_SORT_COLUMNS:
+            return jsonify({"msg": "Invalid sort key. Use id or name"}), 400
+        try:
+            authors, next_cursor = keyset_paginate(
+                query, sort, AUTHOR_SORT_COLUMNS[sort], Author.id, request.args,
+            )
+        except ValueError as e:
+            return jsonify({"msg": "Invalid pagination parameters", "error": str(e)}), 400
+    else:
+        authors = query.order_by(Author.id).all()
+
+    counts = _book_counts([author.id for author in authors])
     authors_data = []
     for author in authors:
         author_dict = author.to_dict()
-        author_dict['book_count'] = len(author.books)
+        author_dict['book_count'] = counts.get(author.id, 0)
         authors_data.append(author_dict)
+
+    if wants_page(request.args):
+        return jsonify({"items": authors_data, "next_cursor": next_cursor}), 200
     return jsonify(authors_data), 200
 
 
 @author_bp.route("/<int:author_id>", methods=["GET"])
+@query_budget(4)
+@cached_response(live_stock=True)
 def get_author_profile(author_id):
-    author = db.session.get(Author, author_id)
+    author = db.session.get(
+        Author, author_id,
+        options=[selectinload(Author.books).selectinload(Book.authors)],
+    )
     
     if not author:
         return jsonify({"msg": "Author not found"}), 404
@@ -1,24 +1,226 @@
-from flask import Blueprint, request, jsonify
-from flask_jwt_extended import  jwt_required
-from models.models import db, Book, Author
+from flask import Blueprint, current_app, request, jsonify
+from flask_jwt_extended import  jwt_required, get_jwt_identity
+from sqlalchemy import case, func
+from sqlalchemy.orm import selectinload
+from models.models import db, Book, Author, book_author_association
 from libs.utils import requires_roles
+from libs.query_budget import query_budget
+from libs.pagination import keyset_paginate, page_size, wants_page
+from libs.search import search_book_ids
+from libs.cache import cached_response
+from libs.assets import local_asset_name, signed_file_url
+from libs.entitlements import owns_book
+from libs.catalog_import import CatalogImporter, detect_format, iter_records
 from datetime import datetime
+import io
 
 book_bp = Blueprint('book_bp', __name__)
 
+SORT_COLUMNS = {
+    'id': Book.id,
+    'title': Book.title,
+    'price': Book.price,
+    'publication_date': Book.publication_date,
+}
+
+
+def _parse_date(value):
+    return datetime.strptime(value, '%Y-%m-%d').date()
+
+
+def _filters_on_stock(args):
+    return 'in_stock' in args
+
+
+def _parse_bool(value):
+    if value.lower() in ('1', 'true', 'yes'):
+        return True
+    if value.lower() in ('0', 'false', 'no'):
+        return False
+    raise ValueError(f"Invalid boolean value: {value}")
+
+
+def _catalog_filters(args):
+    """Map each facet name to the WHERE clauses it contributes.
+
+    Keeping them grouped lets /facets drop a facet's own clauses when it
+    counts that facet, so counts show what selecting another value gives.
+    """
+    filters = {}
+    try:
+        price = []
+        if args.get('min_price'):
+            price.append(Book.price >= float(args['min_price']))
+        if args.get('max_price'):
+            price.append(Book.price <= float(args['max_price']))
+        if price:
+            filters['price'] = price
+
+        published = []
+        if args.get('published_from'):
+            published.append(Book.publication_date >= _parse_date(args['published_from']))
+        if args.get('published_to'):
+            published.append(Book.publication_date <= _parse_date(args['published_to']))
+        if published:
+            filters['publication_date'] = published
+
+        if args.get('author_id'):
+            author_id = int(args['author_id'])
+            filters['author'] = [Book.id.in_(
+                db.select(book_author_association.c.book_id)
+                .where(book_author_association.c.author_id == author_id)
+            )]
+
+        if args.get('in_stock') and _parse_bool(args['in_stock']):
+            filters['in_stock'] = [Book.stock_quantity > 0]
+
+        if args.get('is_recommended'):
+            filters['is_recommended'] = [Book.is_recommended == _parse_bool(args['is_recommended'])]
+    except ValueError as e:
+        raise ValueError(f"Invalid filter: {e}")
+    return filters
+
+
+def _apply_filters(query, filters, exclude=None):
+    for name, clauses in filters.items():
+        if name != exclude:
+            query = query.filter(*clauses)
+    return query
+
+
+def _book_listing(query):
+    sort = request.args.get('sort', 'id')
+    order = request.args.get('order', 'asc')
+    if sort not in SORT_COLUMNS:
+        return jsonify({"msg": f"Invalid sort key. Use one of: {', '.join(SORT_COLUMNS)}"}), 400
+    if order not in ('asc', 'desc'):
+        return jsonify({"msg": "Invalid order. Use asc or desc"}), 400
+
+    try:
+        query = _apply_filters(query, _catalog_filters(request.args))
+    except ValueError as e:
+        return jsonify({"msg": str(e)}), 400
+    query = query.options(selectinload(Book.authors))
+
+    # Without ?limit= or ?cursor= the endpoint keeps returning a plain list
+    if not wants_page(request.args):
+        column = SORT_COLUMNS[sort]
+        if order == 'desc':
+            books = query.order_by(column.desc(), Book.id.desc()).all()
+        else:
+            books = query.order_by(column.asc(), Book.id.asc()).all()
+        return jsonify([book.to_dict(include_img_url=True) for book in books]), 200
+
+    try:
+        books, next_cursor = keyset_paginate(
+            query, sort, SORT_COLUMNS[sort], Book.id, request.args,
+            descending=(order == 'desc'),
+            parse_value=_parse_date if sort == 'publication_date' else None,
+        )
+    except ValueError as e:
+        return jsonify({"msg": "Invalid pagination parameters", "error": str(e)}), 400
+
+    return jsonify({
+        "items": [book.to_dict(include_img_url=True) for book in books],
+        "next_cursor": next_cursor,
+    }), 200
+
+
+def _price_bucket_counts(filters):
+    bounds = current_app.config['CATALOG_PRICE_BUCKETS']
+    whens = [(Book.price < upper, i) for i, upper in enumerate(bounds[1:])]
+    bucket = case(*whens, else_=len(bounds) - 1).label('bucket')
+
+    query = _apply_filters(db.select(bucket, func.count()).select_from(Book), filters, exclude='price')
+    counts = dict(db.session.execute(query.group_by(bucket)).all())
+
+    buckets = []
+    for i, lower in enumerate(bounds):
+        upper = bounds[i + 1] if i + 1 < len(bounds) else None
+        buckets.append({"min": lower, "max": upper, "count": counts.get(i, 0)})
+    return buckets
+
+
+def _author_counts(filters):
+    ba = book_author_association
+    query = (
+        db.select(Author.id, Author.first_name, Author.last_name, func.count().label('count'))
+        .select_from(ba)
+        .join(Book, Book.id == ba.c.book_id)
+        .join(Author, Author.id == ba.c.author_id)
+    )
+    query = _apply_filters(query, filters, exclude='author')
+    query = (
+        query.group_by(Author.id)
+        .order_by(func.count().desc(), Author.id)
+        .limit(current_app.config['CATALOG_AUTHOR_FACET_LIMIT'])
+    )
+    return [
+        {"id": author_id, "name": f"{first_name} {last_name}", "count": count}
+        for author_id, first_name, last_name, count in db.session.execute(query)
+    ]
+
+
+def _flag_count(filters, name, clause):
+    query = _apply_filters(db.select(func.count()).select_from(Book), filters, exclude=name)
+    return db.session.execute(query.where(clause)).scalar()
+
+
 @book_bp.route('/', methods=['GET'])
+@query_budget(3)
+@cached_response(live_stock=True, keyed_on_stock=_filters_on_stock)
 def list_books():
-    books = Book.query.all()
-    return jsonify([book.to_dict(include_img_url=True) for book in books]), 200
+    return _book_listing(Book.query)
 
 @book_bp.route('/recommended', methods=['GET'])
+@query_budget(3)
+@cached_response(live_stock=True, keyed_on_stock=_filters_on_stock)
 def list_recommended_books():
-    books = Book.query.filter_by(is_recommended=True).all()
-    return jsonify([book.to_dict(include_img_url=True) for book in books]), 200
+    return _book_listing(Book.query.filter_by(is_recommended=True))
+
+@book_bp.route('/facets', methods=['GET'])
+@query_budget(6)
+@cached_response(keyed_on_stock=lambda args: True)
+def book_facets():
+    try:
+        filters = _catalog_filters(request.args)
+    except ValueError as e:
+        return jsonify({"msg": str(e)}), 400
+
+    total = db.session.execute(_apply_filters(db.select(func.count()).select_from(Book), filters)).scalar()
+    return jsonify({
+        "total": total,
+        "price": _price_bucket_counts(filters),
+        "authors": _author_counts(filters),
+        "in_stock": _flag_count(filters, 'in_stock', Book.stock_quantity > 0),
+        "is_recommended": _flag_count(filters, 'is_recommended', Book.is_recommended.is_(True)),
+    }), 200
+
+@book_bp.route('/search', methods=['GET'])
+@query_budget(4)
+@cached_response(live_stock=True)
+def search_books():
+    q = request.args.get('q', '').strip()
+    if not q:
+        return jsonify({"msg": "Missing search query"}), 400
+
+    try:
+        limit = page_size(request.args)
+    except ValueError as e:
+        return jsonify({"msg": "Invalid pagination parameters", "error": str(e)}), 400
+
+    book_ids = search_book_ids(q, limit)
+    books = Book.query.options(selectinload(Book.authors)).filter(Book.id.in_(book_ids)).all() if book_ids else []
+    by_id = {book.id: book for book in books}
+
+    # Keep the relevance order from the FTS index
+    return jsonify([by_id[i].to_dict(include_img_url=True) for i in book_ids if i in by_id]), 200
 
 @book_bp.route('/<int:book_id>', methods=['GET'])
+@query_budget(3)
+@cached_response(live_stock=True)
 def get_book(book_id):
-    book = db.session.get(Book, book_id)
+    book = db.session.get(Book, book_id, options=[selectinload(Book.authors)])
     
     if not book:
         return jsonify({"msg": "Book not found"}), 404
@@ -26,6 +228,26 @@ def get_book(book_id):
     return jsonify(book.to_dict(include_img_url=True)), 200
 
 
+@book_bp.route('/<int:book_id>/download-link', methods=['GET'])
+@jwt_required()
+@query_budget(2)
+def get_download_link(book_id):
+    if not owns_book(get_jwt_identity(), book_id):
+        return jsonify({"msg": "Access forbidden: You have not purchased this book"}), 403
+
+    book = db.session.get(Book, book_id)
+    if not book or not book.file_url:
+        return jsonify({"msg": "Book file not found"}), 404
+
+    name = local_asset_name('files', book.file_url)
+    if not name:
+        # Externally hosted files cannot be signed by us
+        return jsonify({"url": book.file_url, "expires_at": None}), 200
+
+    url, expires = signed_file_url(name, current_app.config['DOWNLOAD_LINK_TTL'])
+    return jsonify({"url": url, "expires_at": expires}), 200
+
+
 @book_bp.route('/', methods=['POST'])
 @jwt_required()
 @requires_roles("admin", "superadmin") 
@@ -68,6 +290,34 @@ def create_book():
         db.session.rollback()
         return jsonify({"msg": "Error creating book", "error": str(e)}), 500
     
+@book_bp.route('/import', methods=['POST'])
+@jwt_required()
+@requires_roles("admin", "superadmin")
+def import_books():
+    # Accept a multipart upload ("file") or the raw request body
+    upload = request.files.get('file')
+    if upload:
+        stream, filename = upload.stream, upload.filename
+    else:
+        stream, filename = io.BufferedReader(request.stream), None
+
+    fmt = detect_format(request.args.get('format'), filename)
+    if fmt not in ('csv', 'jsonl'):
+        return jsonify({"msg": "Unsupported format. Use ?format=csv or ?format=jsonl"}), 400
+
+    try:
+        batch_size = int(request.args.get('batch_size', current_app.config['IMPORT_BATCH_SIZE']))
+    except ValueError:
+        return jsonify({"msg": "batch_size must be an integer"}), 400
+    if batch_size <= 0:
+        return jsonify({"msg": "batch_size must be positive"}), 400
+    if batch_size > current_app.config['IMPORT_MAX_BATCH_SIZE']:
+        return jsonify({"msg": f"batch_size must be at most {current_app.config['IMPORT_MAX_BATCH_SIZE']}"}), 400
+
+    importer = CatalogImporter(batch_size=batch_size, max_errors=current_app.config['IMPORT_MAX_ERRORS'])
+    report = importer.run(iter_records(stream, fmt))
+    return jsonify(report.to_dict()), 200
+
 @book_bp.route('/<int:book_id>', methods=['PUT'])
 @jwt_required()
 @requires_roles("admin", "superadmin") 
@@ -0,0 +1,69 @@
+from flask import Blueprint, current_app, request, jsonify
+from flask_jwt_extended import jwt_required, get_jwt_identity
+from sqlalchemy.exc import OperationalError
+from models.models import db, Reservation
+from libs.inventory import OutOfStock, release_reservation, reserve_stock
+from libs.pricing import InvalidItems, load_books, parse_items, quote
+from libs.query_budget import query_budget
+
+cart_bp = Blueprint("cart_bp", __name__)
+
+
+@cart_bp.route("/quote", methods=["POST"])
+@query_budget(1)
+def quote_cart():
+    data = request.get_json(silent=True) or {}
+
+    try:
+        lines = parse_items(data.get("items"))
+    except InvalidItems as e:
+        return jsonify({"msg": str(e)}), 400
+
+    books = load_books([book_id for book_id, _ in lines])
+    return jsonify(quote(lines, books)), 200
+
+
+@cart_bp.route("/reservations", methods=["POST"])
+@jwt_required()
+def create_reservation():
+    data = request.get_json(silent=True) or {}
+
+    try:
+        lines = parse_items(data.get("items"))
+    except InvalidItems as e:
+        return jsonify({"msg": str(e)}), 400
+
+    books = load_books([book_id for book_id, _ in lines])
+    for book_id, _ in lines:
+        if book_id not in books:
+            return jsonify({"msg": f"Book with ID {book_id} not found"}), 404
+
+    try:
+        reservation = reserve_stock(get_jwt_identity(), lines, current_app.config['RESERVATION_TTL'])
+        db.session.commit()
+    except OutOfStock as e:
+        db.session.rollback()
+        return jsonify({"msg": str(e)}), 409
+    except OperationalError as e:
+        db.session.rollback()
+        return jsonify({"msg": "Checkout is busy, please try again", "error": str(e.orig)}), 503
+
+    return jsonify(reservation.to_dict()), 201
+
+
+@cart_bp.route("/reservations/<int:reservation_id>", methods=["DELETE"])
+@jwt_required()
+def delete_reservation(reservation_id):
+    reservation = db.session.get(Reservation, reservation_id)
+    if not reservation or reservation.user_id != get_jwt_identity():
+        return jsonify({"msg": "Reservation not found"}), 404
+
+    try:
+        release_reservation(reservation)
+        db.session.commit()
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({"msg": "Error releasing reservation", "error": str(e)}), 500
+
+    return jsonify({"msg": "Reservation released"}), 200
+
@@ -0,0 +1,82 @@
+from flask import Blueprint, current_app, request, jsonify
+from sqlalchemy import func
+from sqlalchemy.orm import selectinload
+from models.models import db, Author, Book, CatalogTombstone
+from libs.cache import get_catalog_version
+from libs.pagination import InvalidCursor, decode_cursor, encode_cursor
+from libs.query_budget import query_budget
+
+catalog_bp = Blueprint("catalog_bp", __name__)
+
+
+def _parse_since(token):
+    # No token means a first sync; rows that predate versioning carry 0
+    if not token:
+        return -1
+    cursor = decode_cursor(token)
+    if not isinstance(cursor.get("v"), int):
+        raise InvalidCursor("Malformed sync token")
+    return cursor["v"]
+
+
+def _window_end(since, current, limit):
+    """Pick the last version to include so a page holds about ``limit`` books.
+
+    All rows of one version are returned together, so a single large write
+    (e.g. one bulk-import batch) can exceed the limit.
+    """
+    next_version = db.session.execute(
+        db.select(Book.catalog_version)
+        .where(Book.catalog_version > since)
+        .order_by(Book.catalog_version)
+        .offset(limit)
+        .limit(1)
+    ).scalar()
+    if next_version is None:
+        return current
+    if next_version - 1 > since:
+        return next_version - 1
+    return next_version
+
+
+@catalog_bp.route("/changes", methods=["GET"])
+@query_budget(7)
+def catalog_changes():
+    try:
+        since = _parse_since(request.args.get("since"))
+    except InvalidCursor as e:
+        return jsonify({"msg": "Invalid sync token", "error": str(e)}), 400
+
+    current = get_catalog_version()
+    limit = current_app.config["CATALOG_SYNC_PAGE_SIZE"]
+    until = _window_end(since, current, limit)
+
+    books = (
+        Book.query.options(selectinload(Book.authors))
+        .filter(Book.catalog_version > since, Book.catalog_version <= until)
+        .order_by(Book.catalog_version, Book.id)
+        .all()
+    )
+    authors = (
+        Author.query
+        .filter(Author.catalog_version > since, Author.catalog_version <= until)
+        .order_by(Author.catalog_version, Author.id)
+        .all()
+    )
+    tombstones = db.session.execute(
+        db.select(CatalogTombstone.entity, CatalogTombstone.entity_id)
+        .where(CatalogTombstone.catalog_version > since, CatalogTombstone.catalog_version <= until)
+        .order_by(CatalogTombstone.catalog_version)
+    ).all()
+
+    deleted = {"books": [], "authors": []}
+    for entity, entity_id in tombstones:
+        deleted[entity + "s"].append(entity_id)
+
+    return jsonify({
+        "books": [book.to_dict(include_img_url=True) for book in books],
+        "authors": [author.to_dict() for author in authors],
+        "deleted": deleted,
+        "next_since": encode_cursor({"v": max(until, since, 0)}),
+        "has_more": until < current,
+    }), 200
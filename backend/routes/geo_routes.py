@@ -0,0 +1,48 @@
+from flask import Blueprint, current_app, request, jsonify
+from libs.gazetteer import get_gazetteer
+
+geo_bp = Blueprint("geo_bp", __name__)
+
+# Lookups are served from the memory-mapped gazetteer and never touch the
+# database; the data only changes on deploy, so responses are cacheable.
+CACHE_MAX_AGE = 86400
+
+
+def _cached(payload):
+    response = jsonify(payload)
+    response.cache_control.public = True
+    response.cache_control.max_age = CACHE_MAX_AGE
+    return response, 200
+
+
+def _unavailable():
+    return jsonify({"msg": "Address lookup is not available"}), 503
+
+
+@geo_bp.route("/autocomplete", methods=["GET"])
+def autocomplete():
+    """Sub-districts whose sub-district, district, province or postal code starts with ?q="""
+    gazetteer = get_gazetteer()
+    if gazetteer is None:
+        return _unavailable()
+    q = request.args.get("q", "")
+    try:
+        limit = int(request.args.get("limit", current_app.config["GEO_AUTOCOMPLETE_LIMIT"]))
+    except ValueError:
+        return jsonify({"msg": "limit must be an integer"}), 400
+    if limit <= 0:
+        return jsonify({"msg": "limit must be positive"}), 400
+    limit = min(limit, current_app.config["GEO_AUTOCOMPLETE_MAX_LIMIT"])
+    return _cached({"items": gazetteer.autocomplete(q, limit)})
+
+
+@geo_bp.route("/postal-codes/<code>", methods=["GET"])
+def postal_code(code):
+    """Every sub-district served by a postal code"""
+    gazetteer = get_gazetteer()
+    if gazetteer is None:
+        return _unavailable()
+    items = gazetteer.by_postal_code(code)
+    if not items:
+        return jsonify({"msg": "Postal code not found"}), 404
+    return _cached({"postal_code": code, "items": items})
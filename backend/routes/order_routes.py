@@ -1,10 +1,68 @@
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, current_app, request, jsonify
+from sqlalchemy import update
+from sqlalchemy.exc import OperationalError
 from flask_jwt_extended import jwt_required, get_jwt_identity
-from models.models import db, Book, Order, OrderItem
+from sqlalchemy.orm import load_only, selectinload
+from sqlalchemy.orm.attributes import set_committed_value
+from models.models import db, ArchivedOrder, ArchivedOrderItem, Book, Order, OrderItem
+from libs.archive import find_order
 from libs.utils import requires_roles
-from datetime import datetime
+from libs.pagination import keyset_paginate, page_size, wants_page
+from libs.query_budget import query_budget
+from libs.entitlements import grant, revoke
+from libs.idempotency import idempotent
+from libs.jobs import enqueue
+from libs import sales  # noqa: F401  registers the record_sale job
+from libs.pricing import InvalidItems, line_total, load_books, parse_items
+from libs.inventory import (
+    OutOfStock, active_reservation, check_stock, convert_reservation, decrement_stock, quantities_by_book,
+)
+from datetime import datetime, timedelta
+import time
 order_bp = Blueprint("order_bp", __name__)
 
+ORDER_STATUSES = ['Pending', 'Completed', 'Cancelled']
+
+
+def _with_items(query, model=Order, item_model=OrderItem):
+    """Load items and their book titles in two IN queries instead of per row."""
+    return query.options(
+        selectinload(model.items).selectinload(item_model.book).load_only(Book.id, Book.title)
+    )
+
+
+def _parse_order_date(value, end=False):
+    """Accept YYYY-MM-DD or an ISO timestamp; a bare ``end`` date covers the whole day."""
+    try:
+        if len(value) == 10:
+            parsed = datetime.strptime(value, '%Y-%m-%d')
+            return parsed + timedelta(days=1) if end else parsed
+        return datetime.fromisoformat(value)
+    except ValueError:
+        raise ValueError(f"Invalid date '{value}'. Use YYYY-MM-DD or an ISO timestamp")
+
+
+def _admin_order_filters(args):
+    clauses = []
+    status = args.get('status')
+    if status:
+        if status not in ORDER_STATUSES:
+            raise ValueError("Invalid status value (Pending, Completed, Cancelled)")
+        clauses.append(Order.status == status)
+    if args.get('user_id'):
+        try:
+            clauses.append(Order.user_id == int(args['user_id']))
+        except ValueError:
+            raise ValueError("user_id must be an integer")
+    if args.get('from'):
+        clauses.append(Order.order_date >= _parse_order_date(args['from']))
+    if args.get('to'):
+        to = args['to']
+        # A date-only upper bound is inclusive of that day
+        clauses.append(Order.order_date < _parse_order_date(to, end=True) if len(to) == 10
+                       else Order.order_date <= _parse_order_date(to))
+    return clauses
+
 
 @order_bp.route("/", methods=["GET"])
 def list_orders():
@@ -16,12 +74,41 @@ def list_orders():
     return jsonify([order.to_dict() for order in orders]), 200
 
 
+@order_bp.route("/me", methods=["GET"])
+@query_budget(3)
+@jwt_required()
+def list_my_orders():
+    # ?compact=true skips the items, leaving one index range scan per page
+    compact = request.args.get('compact', '').lower() in ('1', 'true', 'yes')
+    # ?archived=true pages through orders moved to the archive instead
+    archived = request.args.get('archived', '').lower() in ('1', 'true', 'yes')
+    model, item_model = (ArchivedOrder, ArchivedOrderItem) if archived else (Order, OrderItem)
+
+    query = model.query.filter(model.user_id == get_jwt_identity())
+    if not compact:
+        query = _with_items(query, model, item_model)
+
+    try:
+        orders, next_cursor = keyset_paginate(
+            query, 'order_date', model.order_date, model.id, request.args,
+            descending=True, parse_value=datetime.fromisoformat,
+            limit=page_size(request.args, 'ORDER_HISTORY_PAGE_SIZE', 'ORDER_HISTORY_MAX_PAGE_SIZE'),
+        )
+    except ValueError as e:
+        return jsonify({"msg": "Invalid pagination parameters", "error": str(e)}), 400
+
+    return jsonify({
+        "items": [order.to_dict(include_items=not compact) for order in orders],
+        "next_cursor": next_cursor,
+    }), 200
+
+
 @order_bp.route("/<int:order_id>", methods=["GET"])
 @jwt_required()
 def get_order(order_id):
 
     user_id = get_jwt_identity()
-    order = db.session.get(Order, order_id)
+    order = find_order(order_id)
 
     if not order:
         return jsonify({"msg": "Order not found"}), 404
@@ -32,74 +119,106 @@ def get_order(order_id):
     return jsonify(order.to_dict()), 200
 
 
-@order_bp.route("/", methods=["POST"])
-@jwt_required()
-def place_order():
-    data = request.get_json()
-    items = data.get("items")
-
-    if not items:
-        return jsonify({"msg": "Order must contain at least one item"}), 400
-
-    user_id = get_jwt_identity()
-    new_order = Order(user_id=user_id, total_amount=0)
-
-    calculate_total = 0
-    order_items = []
+def _checkout(user_id, lines, reservation_id=None):
+    # An expired or unknown reservation just means a regular checkout. Resolve
+    # it before loading the books: releasing an expired hold changes their stock
+    reservation = active_reservation(user_id, reservation_id) if reservation_id else None
+    books = load_books([book_id for book_id, _ in lines])
+    for book_id, _ in lines:
+        if book_id not in books:
+            return jsonify({"msg": f"Book with ID {book_id} not found"}), 404
 
-    try:
-        for item in items:
-            book_id = item.get("book_id")
-            quantity = item.get("quantity", 1)
+    quantities = quantities_by_book(lines)
+    if not reservation:
+        check_stock(books, quantities)
 
-            if not book_id or quantity <= 0:
-                return jsonify({"msg": "Invalid book ID or quantity"}), 400
+    order_items = [
+        OrderItem(book_id=book_id, quantity=quantity, price_at_purchase=books[book_id].price)
+        for book_id, quantity in lines
+    ]
+    new_order = Order(
+        user_id=user_id,
+        total_amount=sum(line_total(books[book_id], quantity) for book_id, quantity in lines),
+        items=order_items,
+    )
 
-            book = db.session.get(Book, book_id)
-            if not book:
-                return jsonify({"msg": f"Book with ID {book_id} not found"}), 404
+    if reservation:
+        convert_reservation(reservation, quantities)
+    else:
+        decrement_stock(quantities)
+    db.session.add(new_order)
+    grant(user_id, books.keys())
 
-            # Check stock availability
-            if book.stock_quantity < quantity:
-                return jsonify({
-                    "msg": f"Insufficient stock for '{book.title}'. Available: {book.stock_quantity}, Requested: {quantity}"
-                }), 400
+    # Serialize before commit while the books are still in the identity map,
+    # instead of reloading the expired order and each item's book afterwards
+    db.session.flush()
+    enqueue("record_sale", order_id=new_order.id)
+    order_data = new_order.to_dict()
+    db.session.commit()
 
-            price = book.price
-            total_amount = price * quantity
-            calculate_total += total_amount
+    return (
+        jsonify({"msg": "Order placed successfully", "order": order_data}),
+        201,
+    )
 
-            order_item = OrderItem(
-                book_id=book_id, quantity=quantity, price_at_purchase=price
-            )
 
-            order_items.append(order_item)
-            
-            # Reduce stock quantity
-            book.stock_quantity -= quantity
+@order_bp.route("/", methods=["POST"])
+@jwt_required()
+@idempotent
+def place_order():
+    data = request.get_json()
 
-        new_order.total_amount = calculate_total
-        new_order.items = order_items
+    try:
+        lines = parse_items(data.get("items"))
+    except InvalidItems as e:
+        return jsonify({"msg": str(e)}), 400
 
-        db.session.add(new_order)
-        db.session.commit()
+    user_id = get_jwt_identity()
+    attempts = current_app.config['ORDER_RETRY_ATTEMPTS']
 
-        return (
-            jsonify({"msg": "Order placed successfully", "order": new_order.to_dict()}),
-            201,
-        )
-    except Exception as e:
-        db.session.rollback()
-        return jsonify({"msg": "Error placing order", "error": str(e)}), 500
+    for attempt in range(attempts):
+        try:
+            return _checkout(user_id, lines, data.get("reservation_id"))
+        except OutOfStock as e:
+            db.session.rollback()
+            return jsonify({"msg": str(e)}), 409
+        except OperationalError as e:
+            # SQLite "database is locked" under write contention: back off and retry
+            db.session.rollback()
+            if attempt + 1 == attempts:
+                return jsonify({"msg": "Checkout is busy, please try again", "error": str(e.orig)}), 503
+            time.sleep(current_app.config['ORDER_RETRY_BACKOFF'] * (2 ** attempt))
+        except Exception as e:
+            db.session.rollback()
+            return jsonify({"msg": "Error placing order", "error": str(e)}), 500
 
 @order_bp.route('/admin/all', methods=['GET'])
+@query_budget(4)
 @jwt_required()
 @requires_roles('admin')
 def get_all_orders_admin():
+    try:
+        query = _with_items(Order.query.filter(*_admin_order_filters(request.args)))
+    except ValueError as e:
+        return jsonify({"msg": str(e)}), 400
 
-    all_orders = Order.query.order_by(Order.order_date.desc()).all()
-    
-    return jsonify([order.to_dict() for order in all_orders]), 200
+    # Without ?limit= or ?cursor= the endpoint keeps returning a plain list
+    if not wants_page(request.args):
+        all_orders = query.order_by(Order.order_date.desc(), Order.id.desc()).all()
+        return jsonify([order.to_dict() for order in all_orders]), 200
+
+    try:
+        orders, next_cursor = keyset_paginate(
+            query, 'order_date', Order.order_date, Order.id, request.args,
+            descending=True, parse_value=datetime.fromisoformat,
+        )
+    except ValueError as e:
+        return jsonify({"msg": "Invalid pagination parameters", "error": str(e)}), 400
+
+    return jsonify({
+        "items": [order.to_dict() for order in orders],
+        "next_cursor": next_cursor,
+    }), 200
 
 
 
@@ -114,7 +233,7 @@ def update_order_status(order_id):
     if not new_status:
         return jsonify({"msg": "New status is required"}), 400
     
-    if new_status not in ['Pending', 'Completed', 'Cancelled']:
+    if new_status not in ORDER_STATUSES:
         return jsonify({"msg": "Invalid status value (Pending, Completed, Cancelled)"}), 400
     
     order = db.session.get(Order, order_id)
@@ -123,11 +242,36 @@ def update_order_status(order_id):
         return jsonify({"msg": "Order not found"}), 404
     
     try:
-        order.status = new_status
+        # Conditional on the status we read, so of two concurrent changes
+        # only one applies and the entitlement/rollup side effects run once
+        old_status = order.status
+        changed = db.session.execute(
+            update(Order)
+            .where(Order.id == order_id, Order.status.is_not_distinct_from(old_status))
+            .values(status=new_status),
+            execution_options={"synchronize_session": False},
+        )
+        if changed.rowcount != 1:
+            db.session.rollback()
+            return jsonify({"msg": "Order status was changed concurrently, please retry"}), 409
+
+        book_ids = [item.book_id for item in order.items]
+        if new_status == 'Cancelled' and old_status != 'Cancelled':
+            revoke(order.user_id, book_ids)
+            enqueue("record_sale", order_id=order.id, sign=-1)
+        elif old_status == 'Cancelled' and new_status != 'Cancelled':
+            grant(order.user_id, book_ids)
+            enqueue("record_sale", order_id=order.id)
+
+        set_committed_value(order, 'status', new_status)
         db.session.commit()
         
         return jsonify({"msg": "Order status updated", "order": order.to_dict()}), 200
-    
+
+    except OperationalError:
+        # SQLite refused the write because a concurrent change got there first
+        db.session.rollback()
+        return jsonify({"msg": "Order status was changed concurrently, please retry"}), 409
     except Exception as e:
         db.session.rollback()
         return jsonify({"msg": "Error updating order status", "error": str(e)}), 500
\ No newline at end of file
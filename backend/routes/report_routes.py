@@ -0,0 +1,120 @@
+from datetime import datetime
+
+from flask import Blueprint, current_app, request, jsonify
+from flask_jwt_extended import jwt_required
+from sqlalchemy import func
+from models.models import db, Author, Book, BookSalesDaily, SalesDaily, book_author_association
+from libs.utils import requires_roles
+from libs.query_budget import query_budget
+
+report_bp = Blueprint("report_bp", __name__)
+
+# Every report reads the daily rollups only, never Order/OrderItem, so its
+# cost depends on the number of days and books in range, not on order count.
+
+
+def _parse_day(args, name):
+    try:
+        return datetime.strptime(args[name], "%Y-%m-%d").date()
+    except ValueError:
+        raise ValueError(f"Invalid {name} date. Use YYYY-MM-DD")
+
+
+def _date_range(args, column):
+    """Inclusive ?from= / ?to= day filters."""
+    clauses = []
+    if args.get("from"):
+        clauses.append(column >= _parse_day(args, "from"))
+    if args.get("to"):
+        clauses.append(column <= _parse_day(args, "to"))
+    return clauses
+
+
+def _limit(args):
+    try:
+        limit = int(args.get("limit", current_app.config["REPORT_DEFAULT_LIMIT"]))
+    except ValueError:
+        raise ValueError("limit must be an integer")
+    if limit <= 0:
+        raise ValueError("limit must be positive")
+    return min(limit, current_app.config["REPORT_MAX_LIMIT"])
+
+
+@report_bp.route("/top-sellers", methods=["GET"])
+@query_budget(2)
+@jwt_required()
+@requires_roles("admin", "superadmin")
+def top_sellers():
+    try:
+        clauses = _date_range(request.args, BookSalesDaily.day)
+        limit = _limit(request.args)
+    except ValueError as e:
+        return jsonify({"msg": str(e)}), 400
+
+    units = func.sum(BookSalesDaily.units).label("units")
+    revenue = func.sum(BookSalesDaily.revenue).label("revenue")
+    rows = db.session.execute(
+        db.select(Book.id, Book.title, units, revenue)
+        .join(Book, Book.id == BookSalesDaily.book_id)
+        .where(*clauses)
+        .group_by(Book.id)
+        .having(units > 0)
+        .order_by(units.desc(), Book.id)
+        .limit(limit)
+    ).all()
+    return jsonify([
+        {"book_id": book_id, "title": title, "units": units, "revenue": revenue}
+        for book_id, title, units, revenue in rows
+    ]), 200
+
+
+@report_bp.route("/revenue", methods=["GET"])
+@query_budget(2)
+@jwt_required()
+@requires_roles("admin", "superadmin")
+def revenue_by_day():
+    try:
+        clauses = _date_range(request.args, SalesDaily.day)
+    except ValueError as e:
+        return jsonify({"msg": str(e)}), 400
+
+    days = SalesDaily.query.filter(*clauses).order_by(SalesDaily.day).all()
+    return jsonify({
+        "days": [
+            {"day": d.day.isoformat(), "orders": d.orders, "units": d.units, "revenue": d.revenue}
+            for d in days
+        ],
+        "total_orders": sum(d.orders for d in days),
+        "total_units": sum(d.units for d in days),
+        "total_revenue": sum(d.revenue for d in days),
+    }), 200
+
+
+@report_bp.route("/authors", methods=["GET"])
+@query_budget(2)
+@jwt_required()
+@requires_roles("admin", "superadmin")
+def units_by_author():
+    try:
+        clauses = _date_range(request.args, BookSalesDaily.day)
+        limit = _limit(request.args)
+    except ValueError as e:
+        return jsonify({"msg": str(e)}), 400
+
+    # A book with several authors counts towards each of them
+    units = func.sum(BookSalesDaily.units).label("units")
+    revenue = func.sum(BookSalesDaily.revenue).label("revenue")
+    rows = db.session.execute(
+        db.select(Author.id, Author.first_name, Author.last_name, units, revenue)
+        .join(book_author_association, book_author_association.c.book_id == BookSalesDaily.book_id)
+        .join(Author, Author.id == book_author_association.c.author_id)
+        .where(*clauses)
+        .group_by(Author.id)
+        .having(units > 0)
+        .order_by(units.desc(), Author.id)
+        .limit(limit)
+    ).all()
+    return jsonify([
+        {"author_id": author_id, "name": f"{first} {last}", "units": units, "revenue": revenue}
+        for author_id, first, last, units, revenue in rows
+    ]), 200
@@ -1,16 +1,55 @@
 from flask import Blueprint, request, jsonify
+from sqlalchemy import or_
+from sqlalchemy.orm import contains_eager
 from models.models import db, User, Role
 from flask_jwt_extended import jwt_required
-from libs.utils import requires_roles
+from libs.utils import get_role_cache, requires_roles
+from libs.pagination import keyset_paginate, page_size, wants_page
+from libs.query_budget import query_budget
 
 user_bp = Blueprint("user_bp", __name__)
 
+USER_SORT_COLUMNS = {
+    "id": User.id,
+    "username": User.username,
+}
+
+
 @user_bp.route("/", methods=["GET"])
+@query_budget(2)
 @jwt_required()
 @requires_roles("admin", "superadmin") 
 def list_users():
-    users = User.query.all()
-    return jsonify([u.to_dict() for u in users]), 200
+    # Roles come from the same query instead of one lazy load per user
+    query = User.query.join(User.role).options(contains_eager(User.role))
+
+    # ?q= matches the start of the username or email, case-insensitively
+    prefix = request.args.get("q", "").strip().replace("%", "").replace("_", "")
+    if prefix:
+        query = query.filter(or_(
+            User.username.like(f"{prefix}%"),
+            User.email.like(f"{prefix}%"),
+        ))
+
+    if request.args.get("role"):
+        query = query.filter(Role.name == request.args["role"])
+
+    if not wants_page(request.args):
+        users = query.order_by(User.id).all()
+        return jsonify([u.to_dict() for u in users]), 200
+
+    sort = request.args.get("sort", "id")
+    if sort not in USER_SORT_COLUMNS:
+        return jsonify({"msg": "Invalid sort key. Use id or username"}), 400
+    try:
+        users, next_cursor = keyset_paginate(
+            query, sort, USER_SORT_COLUMNS[sort], User.id, request.args,
+            limit=page_size(request.args, "USER_PAGE_SIZE", "USER_MAX_PAGE_SIZE"),
+        )
+    except ValueError as e:
+        return jsonify({"msg": "Invalid pagination parameters", "error": str(e)}), 400
+
+    return jsonify({"items": [u.to_dict() for u in users], "next_cursor": next_cursor}), 200
 
 
 @user_bp.route("/<int:user_id>/role", methods=["PUT"])
@@ -37,6 +76,7 @@ def update_role(user_id):
 
     try:
         db.session.commit()
+        get_role_cache().invalidate(user_id)
         return jsonify({"msg": "Role updated successfully"}), 200
     except Exception as e:
         db.session.rollback()
@@ -0,0 +1,45 @@
+"""
+Run background job workers outside the web process
+Usage: python run_worker.py [--threads 4] [--once]
+Set JOB_WORKERS_ENABLED = False in config.py when workers run separately.
+"""
+import argparse
+import signal
+
+import config
+from app import create_app
+from libs.jobs import requeue_stale_jobs, run_pending_jobs, start_job_workers
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run queued background jobs")
+    parser.add_argument("--threads", type=int, help="worker threads (default JOB_WORKER_THREADS)")
+    parser.add_argument("--once", action="store_true", help="run every due job, then exit")
+    args = parser.parse_args()
+
+    # This process is the worker; don't also start the in-process pool
+    config.Config.JOB_WORKERS_ENABLED = False
+    app = create_app()
+
+    if args.once:
+        with app.app_context():
+            requeue_stale_jobs()
+            ran = run_pending_jobs()
+        print(f"✅ Ran {ran} jobs")
+        return
+
+    workers, stop = start_job_workers(app, threads=args.threads)
+    signal.signal(signal.SIGTERM, lambda *_: stop.set())
+    print(f"✅ {len(workers) - 1} job workers running, Ctrl+C to stop")
+    try:
+        while not stop.wait(1):
+            pass
+    except KeyboardInterrupt:
+        stop.set()
+    for worker in workers:
+        worker.join()
+    print("ℹ️ Workers stopped")
+
+
+if __name__ == "__main__":
+    main()
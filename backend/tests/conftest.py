@@ -0,0 +1,27 @@
+import pytest
+
+import config
+from app import create_app
+from models.models import db
+
+
+class TestConfig(config.Config):
+    TESTING = True
+    PASSWORD_POOL_ENABLED = False
+    JOB_WORKERS_ENABLED = False
+    RESERVATION_SWEEPER_ENABLED = False
+
+
+@pytest.fixture
+def app(tmp_path):
+    TestConfig.SQLALCHEMY_DATABASE_URI = "sqlite:///" + str(tmp_path / "test.db")
+    app = create_app(TestConfig, start_background=False)
+    yield app
+    with app.app_context():
+        db.session.remove()
+        db.engine.dispose()
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
@@ -0,0 +1,38 @@
+import io
+
+from libs import catalog_import
+from libs.catalog_import import CatalogImporter, iter_records
+from libs.search import search_book_ids
+from models.models import db, Book
+
+
+def import_csv(text, batch_size):
+    importer = CatalogImporter(batch_size=batch_size)
+    return importer.run(iter_records(io.BytesIO(text.encode()), "csv"))
+
+
+def test_every_imported_book_is_searchable(app, monkeypatch):
+    monkeypatch.setattr(catalog_import, "SEARCH_REINDEX_ROWS", 4)
+    rows = "".join(f"Volume{i},10,1,2020-01-0{1 + i % 9},Ann Lee\n" for i in range(11))
+    with app.app_context():
+        report = import_csv("title,price,stock_quantity,publication_date,authors\n" + rows, batch_size=3)
+        assert report.inserted == 11 and report.authors_created == 1
+        assert sorted(search_book_ids("Lee", 50)) == [book.id for book in Book.query.order_by(Book.id)]
+        assert len(search_book_ids("Volume10", 50)) == 1
+
+
+def test_batch_after_a_concurrent_insert_fails_then_import_recovers(app):
+    def records():
+        yield 2, {"title": "A", "price": "1"}
+        yield 3, {"title": "B", "price": "1"}
+        # Another writer takes the next id between batches
+        db.session.add(Book(title="Other", price=1))
+        db.session.commit()
+        yield 4, {"title": "C", "price": "1"}
+        yield 5, {"title": "D", "price": "1"}
+        yield 6, {"title": "E", "price": "1"}
+
+    with app.app_context():
+        report = CatalogImporter(batch_size=2).run(records())
+        assert (report.inserted, report.failed) == (3, 2)
+        assert [book.title for book in Book.query.order_by(Book.id)] == ["A", "B", "Other", "E"]
@@ -0,0 +1,52 @@
+import threading
+
+from flask_jwt_extended import create_access_token
+
+from libs.cache import CATALOG_STATE_ID, STOCK_STATE_ID
+from models.models import db, Book, CatalogState, Role, User
+
+
+def make_buyer(app, name):
+    with app.app_context():
+        user = User(username=name, email=f"{name}@example.com", role_id=Role.query.first().id)
+        db.session.add(user)
+        db.session.commit()
+        return {"Authorization": f"Bearer {create_access_token(identity=user.id)}"}
+
+
+def versions():
+    return {state.id: state.version for state in CatalogState.query}
+
+
+def test_concurrent_checkouts_of_the_last_copy(app):
+    buyers = [make_buyer(app, f"buyer{n}") for n in range(2)]
+    with app.app_context():
+        book = Book(title="Last Copy", price=10, stock_quantity=1)
+        db.session.add(book)
+        db.session.commit()
+        book_id = book.id
+        before = versions()
+
+    start = threading.Barrier(len(buyers))
+    statuses = []
+
+    def checkout(headers):
+        client = app.test_client()
+        start.wait()
+        response = client.post("/api/orders/", json={"items": [{"book_id": book_id, "quantity": 1}]}, headers=headers)
+        statuses.append(response.status_code)
+
+    threads = [threading.Thread(target=checkout, args=(headers,)) for headers in buyers]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert sorted(statuses) == [201, 409]
+    with app.app_context():
+        assert db.session.get(Book, book_id).stock_quantity == 0
+        after = versions()
+        # Stock changes move only the stock version; the catalog version keys
+        # the response cache and must not change on checkout
+        assert after[CATALOG_STATE_ID] == before[CATALOG_STATE_ID]
+        assert after[STOCK_STATE_ID] > before[STOCK_STATE_ID]
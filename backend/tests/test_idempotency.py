@@ -0,0 +1,22 @@
+from datetime import datetime, timedelta
+
+from libs import idempotency
+from models.models import db, IdempotencyRecord, Role, User
+
+
+def test_prune_survives_a_lost_claim(app, monkeypatch):
+    monkeypatch.setattr(idempotency, "_last_prune", 0.0)
+    with app.app_context():
+        user = User(username="buyer", email="buyer@example.com", role_id=Role.query.first().id)
+        db.session.add(user)
+        db.session.flush()
+        long_ago = datetime.utcnow() - timedelta(seconds=app.config["IDEMPOTENCY_TTL"] + 60)
+        db.session.add_all([
+            IdempotencyRecord(user_id=user.id, key="old", request_hash="a", status_code=201, created_at=long_ago),
+            IdempotencyRecord(user_id=user.id, key="busy", request_hash="b"),
+        ])
+        db.session.commit()
+
+        # Loses the insert race to the in-progress "busy" request
+        assert not idempotency._claim(user.id, "busy", "b")
+        assert [record.key for record in IdempotencyRecord.query] == ["busy"]
@@ -0,0 +1,69 @@
+from datetime import date
+
+import pytest
+
+from libs.pagination import keyset_paginate, keyset_ranges
+from models.models import db, Author, Book, Order
+
+
+def query_plan(query):
+    sql = query.statement.compile(db.engine, compile_kwargs={"literal_binds": True})
+    return [row[3] for row in db.session.execute(db.text(f"EXPLAIN QUERY PLAN {sql}"))]
+
+
+@pytest.mark.parametrize("column, id_column, last_value, descending", [
+    (Book.id, Book.id, 10, True),
+    (Book.title, Book.id, "Book 10", False),
+    (Book.price, Book.id, 10.0, False),
+    (Book.price, Book.id, 10.0, True),
+    (Book.publication_date, Book.id, date(2020, 1, 1), False),
+    (Book.publication_date, Book.id, date(2020, 1, 1), True),
+    (Book.publication_date, Book.id, None, False),
+    (Book.publication_date, Book.id, None, True),
+    (Author.last_name, Author.id, "Smith", False),
+    (Order.order_date, Order.id, date(2020, 1, 1), True),
+])
+def test_every_keyset_range_is_an_index_search(app, column, id_column, last_value, descending):
+    order = (column.desc(), id_column.desc()) if descending else (column, id_column)
+    with app.app_context():
+        for clause in keyset_ranges(column, id_column, last_value, 10, descending):
+            query = db.session.query(id_column.class_).filter(clause).order_by(*order).limit(25)
+            plan = query_plan(query)
+            assert len(plan) == 1 and plan[0].startswith("SEARCH"), plan
+
+
+def test_order_history_range_uses_the_user_index(app):
+    with app.app_context():
+        [clause] = keyset_ranges(Order.order_date, Order.id, date(2020, 1, 1), 10, descending=True)
+        query = (
+            Order.query.filter(Order.user_id == 1, clause)
+            .order_by(Order.order_date.desc(), Order.id.desc()).limit(21)
+        )
+        assert query_plan(query) == [
+            "SEARCH order USING INDEX ix_order_user_order_date_id (user_id=? AND order_date<?)"
+        ]
+
+
+@pytest.mark.parametrize("descending", [False, True])
+def test_pages_cover_nullable_column_in_order(app, descending):
+    with app.app_context():
+        db.session.add_all(
+            Book(title=f"Book {i}", price=10, publication_date=date(2000 + i % 4, 1, 1) if i % 3 else None)
+            for i in range(30)
+        )
+        db.session.commit()
+        expected = [book.id for book in Book.query.order_by(
+            *((Book.publication_date.desc(), Book.id.desc()) if descending else (Book.publication_date, Book.id))
+        )]
+
+        seen, args = [], {}
+        while True:
+            books, cursor = keyset_paginate(
+                Book.query, "publication_date", Book.publication_date, Book.id, args,
+                descending=descending, parse_value=date.fromisoformat, limit=4,
+            )
+            seen += [book.id for book in books]
+            if not cursor:
+                break
+            args = {"cursor": cursor}
+        assert seen == expected
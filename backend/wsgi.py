@@ -0,0 +1,11 @@
+"""WSGI entry point for production servers:
+
+    gunicorn -c gunicorn.conf.py wsgi:app
+
+Background threads are started per worker by gunicorn.conf.py, not here. With
+preload_app this module is imported once in the gunicorn master, and threads
+do not survive the fork into workers.
+"""
+from app import create_app
+
+app = create_app(start_background=False)
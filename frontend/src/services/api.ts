@@ -51,6 +51,11 @@ export const booksAPI = {
     return response.data;
   },
 
+  search: async (q: string, limit?: number): Promise<Book[]> => {
+    const response = await api.get('/books/search', { params: { q, limit } });
+    return response.data;
+  },
+
   getById: async (id: number): Promise<Book> => {
     const response = await api.get(`/books/${id}`);
     